@@ -15,15 +15,41 @@ Analyse par KOUMI Dzudzogbe Prince Armand :
 
 import pandas as pd
 import numpy as np
+import argparse
 import json
+import os
 from pathlib import Path
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 from datetime import datetime
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# Lecture des classeurs avec cache binaire (excel_cache.py)
+from excel_cache import read_excel
+
+# Corrélations par AP vectorisées, intervalles bootstrap
+from correlation_engine import bootstrap_correlations, grouped_correlations
+
+# Score d'efficacité et quadrants vectorisés
+from efficiency_scoring import quadrant_counts, scenario_quadrants, segment_aps, summarize_categories
+
+# Effets retardés du financement (panel AP x année, effets fixes)
+from panel_analysis import lagged_effects
+
+# Snapshot binaire partagé avec l'API (backend/data_snapshot.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+from data_snapshot import load_table, open_snapshot
+
+# Mode bootstrap : nombre de rééchantillonnages (0 = désactivé) et graine
+BOOTSTRAP = int(os.environ.get("ANALYSE_BOOTSTRAP", 0))
+BOOTSTRAP_SEED = int(os.environ["ANALYSE_SEED"]) if os.environ.get("ANALYSE_SEED") else None
+
+# Quantiles des seuils comparés dans la segmentation (feux x investissement)
+SCENARIO_QUANTILES = (0.25, 0.5, 0.75)
+
 # Configuration graphique
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
@@ -31,8 +57,12 @@ sns.set_palette("husl")
 class FinancementDeforestationAnalyzer:
     """Analyseur expert de la relation financement-déforestation"""
     
-    def __init__(self, data_path="."):
+    def __init__(self, data_path=".", bootstrap=BOOTSTRAP, seed=BOOTSTRAP_SEED, workers=1):
         self.data_path = Path(data_path)
+        # bootstrap : rééchantillonnages pour les IC des corrélations (0 = désactivé)
+        self.bootstrap = bootstrap
+        self.seed = seed
+        self.workers = workers
         self.yearly_data = None
         self.summary_data = None
         self.results = {}
@@ -44,8 +74,9 @@ class FinancementDeforestationAnalyzer:
         
         # Données annuelles unifiées
         unified_path = self.data_path / "backend/data/unified_yearly.csv"
-        if unified_path.exists():
-            self.yearly_data = pd.read_csv(unified_path)
+        snapshot_path = self.data_path / "backend/data/snapshot"
+        if unified_path.exists() or open_snapshot(snapshot_path) is not None:
+            self.yearly_data = load_table("yearly", unified_path, root=snapshot_path)
             print(f"✅ Données annuelles : {len(self.yearly_data)} observations")
             print(f"   Période : {self.yearly_data['Année'].min()} - {self.yearly_data['Année'].max()}")
             print(f"   AP uniques : {self.yearly_data['AP_Name'].nunique()}")
@@ -57,7 +88,7 @@ class FinancementDeforestationAnalyzer:
         try:
             synth_path = self.data_path / "AP_Synthese_clean.xlsx"
             if synth_path.exists():
-                self.summary_data = pd.read_excel(synth_path)
+                self.summary_data = read_excel(synth_path)
                 print(f"✅ Synthèse AP : {len(self.summary_data)} aires protégées")
         except Exception as e:
             print(f"⚠️  Synthèse non chargée : {e}")
@@ -95,12 +126,12 @@ class FinancementDeforestationAnalyzer:
         
         # Top/Bottom AP
         print("\n🏆 TOP 5 AP LES PLUS FINANCÉES (total):")
-        top_financed = df.groupby('AP_Name')['Financement_annuel_USD'].sum().sort_values(ascending=False).head()
+        top_financed = df.groupby('AP_Name', observed=True)['Financement_annuel_USD'].sum().sort_values(ascending=False).head()
         for idx, (ap, montant) in enumerate(top_financed.items(), 1):
             print(f"   {idx}. {ap}: {montant:,.0f} USD")
         
         print("\n⚠️  TOP 5 AP AVEC LE PLUS DE FEUX (moyenne):")
-        top_fire = df.groupby('AP_Name')['FIRE_par_100ha_moy'].mean().sort_values(ascending=False).head()
+        top_fire = df.groupby('AP_Name', observed=True)['FIRE_par_100ha_moy'].mean().sort_values(ascending=False).head()
         for idx, (ap, rate) in enumerate(top_fire.items(), 1):
             print(f"   {idx}. {ap}: {rate:.3f} feux/100ha")
         
@@ -143,6 +174,21 @@ class FinancementDeforestationAnalyzer:
         print(f"   Pearson  : r = {corr_pearson:.4f} (p = {p_pearson:.6f})")
         print(f"   Spearman : ρ = {corr_spearman:.4f} (p = {p_spearman:.6f})")
         
+        bootstrap_global = None
+        if self.bootstrap:
+            bootstrap_global = {'n_boot': self.bootstrap, 'seed': self.seed, 'confidence': 0.95}
+            for method in ('pearson', 'spearman'):
+                ci = bootstrap_correlations(None, fin_clean, fire_clean, n_boot=self.bootstrap,
+                                            seed=self.seed, method=method, workers=self.workers).iloc[0]
+                bootstrap_global[f'{method}_ci'] = [ci['ci_low'], ci['ci_high']]
+                bootstrap_global[f'{method}_se'] = ci['se']
+                bootstrap_global[f'{method}_p_permutation'] = ci['p_permutation']
+            print(f"\n🎲 BOOTSTRAP ({self.bootstrap} rééchantillonnages, IC 95%):")
+            print(f"   Pearson  : [{bootstrap_global['pearson_ci'][0]:.4f}, {bootstrap_global['pearson_ci'][1]:.4f}]"
+                  f" (p permutation = {bootstrap_global['pearson_p_permutation']:.4f})")
+            print(f"   Spearman : [{bootstrap_global['spearman_ci'][0]:.4f}, {bootstrap_global['spearman_ci'][1]:.4f}]"
+                  f" (p permutation = {bootstrap_global['spearman_p_permutation']:.4f})")
+        
         # Interprétation
         if abs(corr_pearson) < 0.3:
             strength = "FAIBLE"
@@ -171,28 +217,32 @@ class FinancementDeforestationAnalyzer:
         print(f"\n\n🎯 CORRÉLATION PAR AIRE PROTÉGÉE:")
         print(f"   (Seulement AP avec 3+ observations)")
         
-        ap_correlations = []
-        for ap in df['AP_Name'].unique():
-            ap_data = df[df['AP_Name'] == ap]
-            if len(ap_data) >= 3:
-                try:
-                    corr, pval = stats.pearsonr(
-                        ap_data['Financement_annuel_USD'],
-                        ap_data['FIRE_par_100ha_moy']
-                    )
-                    ap_correlations.append({
-                        'AP': ap,
-                        'correlation': corr,
-                        'p_value': pval,
-                        'n_obs': len(ap_data),
-                        'avg_investment': ap_data['Financement_annuel_USD'].mean(),
-                        'avg_fire': ap_data['FIRE_par_100ha_moy'].mean()
-                    })
-                except:
-                    pass
-        
-        if ap_correlations:
-            df_corr = pd.DataFrame(ap_correlations).sort_values('correlation')
+        # Une seule passe sur les observations triées par AP (correlation_engine)
+        grouped = grouped_correlations(
+            df['AP_Name'], df['Financement_annuel_USD'], df['FIRE_par_100ha_moy'], min_obs=3
+        )
+        ap_correlations = pd.DataFrame({
+            'AP': grouped['group'],
+            'correlation': grouped['pearson'],
+            'p_value': grouped['p_pearson'],
+            'n_obs': grouped['n_obs'],
+            'avg_investment': grouped['mean_x'],
+            'avg_fire': grouped['mean_y'],
+            'spearman': grouped['spearman'],
+            'p_value_spearman': grouped['p_spearman'],
+        })
+        if self.bootstrap and len(ap_correlations):
+            # Mêmes groupes, même ordre que grouped_correlations
+            ci = bootstrap_correlations(
+                df['AP_Name'], df['Financement_annuel_USD'], df['FIRE_par_100ha_moy'],
+                n_boot=self.bootstrap, seed=self.seed, min_obs=3, workers=self.workers
+            )
+            ap_correlations['ci_low'] = ci['ci_low'].to_numpy()
+            ap_correlations['ci_high'] = ci['ci_high'].to_numpy()
+            ap_correlations['p_permutation'] = ci['p_permutation'].to_numpy()
+        
+        if len(ap_correlations):
+            df_corr = ap_correlations.sort_values('correlation')
             
             print(f"\n   🌟 TOP 5 AP OÙ LE FINANCEMENT RÉDUIT LE PLUS LA DÉFORESTATION:")
             for idx, row in df_corr.head().iterrows():
@@ -211,9 +261,11 @@ class FinancementDeforestationAnalyzer:
             'p_value_spearman': p_spearman,
             'interpretation': f"{strength} {direction} {significant}"
         }
+        if bootstrap_global is not None:
+            self.results['global_correlation']['bootstrap'] = bootstrap_global
         
         print("\n")
-        return df_corr if ap_correlations else None
+        return df_corr if len(ap_correlations) else None
     
     def analyse_temporelle(self, df):
         """Phase 3 : Analyse des tendances temporelles"""
@@ -263,13 +315,44 @@ class FinancementDeforestationAnalyzer:
         print("\n")
         return yearly_trends
     
-    def segmentation_efficacite(self, df):
-        """Phase 4 : Segmentation des AP par efficacité du financement"""
+    def analyse_effets_retardes(self):
+        """Phase 3 bis : Effet du financement de l'année t sur les feux et la FCL en t+1..t+3"""
+        print("⏳ PHASE 3 BIS : EFFETS RETARDÉS DU FINANCEMENT (PANEL)")
+        print("=" * 70)
+        
+        # Panel complet : les années sans financement sont aussi informatives
+        effets = lagged_effects(self.yearly_data, lags=(1, 2, 3))
+        if effets.empty:
+            print("   ⚠️  Colonnes cibles absentes, phase ignorée\n")
+            return None
+        
+        print(f"\n📐 Effets fixes AP et année, contrôle du niveau courant, erreurs types groupées par AP")
+        print(f"   Coefficient = variation de la cible en t+k pour 1 M USD de plus en t\n")
+        for _, row in effets.iterrows():
+            label = f"   {row['target']:<22} t+{row['lag']}"
+            if not row['identifiable']:
+                print(f"{label} : non identifiable (cible constante au sein des AP)")
+                continue
+            flag = "✅" if row['p_value'] < 0.05 else "  "
+            print(f"{label} : {row['coef']:+.3e} [{row['ci_low']:+.3e}, {row['ci_high']:+.3e}]"
+                  f" p={row['p_value']:.4f} (n={row['n_obs']}, AP={row['n_ap']}) {flag}")
+        
+        self.results['panel_lags'] = effets
+        
+        print("\n")
+        return effets
+    
+    def segmentation_efficacite(self, df, fire_threshold="median", invest_threshold="median"):
+        """Phase 4 : Segmentation des AP par efficacité du financement
+
+        Seuils des quadrants : "median" ou un quantile (voir efficiency_scoring.threshold)
+        """
         print("🎯 PHASE 4 : SEGMENTATION PAR EFFICACITÉ")
         print("=" * 70)
         
-        # Calculer l'efficacité par AP
-        ap_metrics = df.groupby('AP_Name').agg({
+        # Calculer l'efficacité par AP (AP_Name catégorielle : seules les AP
+        # restantes après filtrage, quelle que soit la version de pandas)
+        ap_metrics = df.groupby('AP_Name', observed=True).agg({
             'Financement_annuel_USD': 'sum',
             'FIRE_par_100ha_moy': 'mean',
             'Superficie_ha': 'first'
@@ -279,55 +362,32 @@ class FinancementDeforestationAnalyzer:
             ap_metrics['Financement_annuel_USD'] / ap_metrics['Superficie_ha']
         )
         
-        # Score d'efficacité : Investissement élevé + Faible déforestation = Bon
-        # Normaliser les métriques
-        ap_metrics['Fire_normalized'] = (
-            (ap_metrics['FIRE_par_100ha_moy'] - ap_metrics['FIRE_par_100ha_moy'].min()) /
-            (ap_metrics['FIRE_par_100ha_moy'].max() - ap_metrics['FIRE_par_100ha_moy'].min())
-        )
-        
-        ap_metrics['Investment_normalized'] = (
-            (ap_metrics['Financement_par_ha'] - ap_metrics['Financement_par_ha'].min()) /
-            (ap_metrics['Financement_par_ha'].max() - ap_metrics['Financement_par_ha'].min())
-        )
-        
-        # Score d'efficacité : Investissement élevé avec faible taux de feu
-        ap_metrics['Efficacite_Score'] = (
-            ap_metrics['Investment_normalized'] * (1 - ap_metrics['Fire_normalized'])
-        )
-        
-        # Segmentation en 4 quadrants
-        median_fire = ap_metrics['FIRE_par_100ha_moy'].median()
-        median_invest = ap_metrics['Financement_par_ha'].median()
-        
-        def categorize(row):
-            if row['FIRE_par_100ha_moy'] < median_fire:
-                if row['Financement_par_ha'] > median_invest:
-                    return "🌟 EFFICACES (Investis + Protégés)"
-                else:
-                    return "🌱 NATURELLEMENT PROTÉGÉES (Peu investis + Peu de feux)"
-            else:
-                if row['Financement_par_ha'] > median_invest:
-                    return "⚠️  SOUS PRESSION (Investis mais encore fragiles)"
-                else:
-                    return "🚨 CRITIQUES (Peu investis + Forte déforestation)"
-        
-        ap_metrics['Categorie'] = ap_metrics.apply(categorize, axis=1)
+        # Score d'efficacité (investissement élevé + faible déforestation) et
+        # segmentation en 4 quadrants, vectorisés (efficiency_scoring)
+        ap_metrics = segment_aps(ap_metrics, fire_threshold, invest_threshold)
         
         print(f"\n📊 RÉPARTITION DES AIRES PROTÉGÉES:\n")
-        for cat in ap_metrics['Categorie'].unique():
-            count = len(ap_metrics[ap_metrics['Categorie'] == cat])
-            percentage = count / len(ap_metrics) * 100
-            print(f"   {cat}: {count} AP ({percentage:.1f}%)")
+        for segment in summarize_categories(ap_metrics, top_k=3):
+            print(f"   {segment['categorie']}: {segment['count']} AP ({segment['percentage']:.1f}%)")
             
             # Exemples
-            examples = ap_metrics[ap_metrics['Categorie'] == cat].nlargest(3, 'Financement_annuel_USD')
-            for _, ex in examples.iterrows():
+            for _, ex in segment['examples'].iterrows():
                 print(f"      • {ex['AP_Name']}: "
                       f"{ex['Financement_annuel_USD']:,.0f} USD, "
                       f"{ex['FIRE_par_100ha_moy']:.3f} feux/100ha")
             print()
         
+        # Sensibilité de la répartition aux seuils (quantiles)
+        codes, scenarios = scenario_quadrants(ap_metrics['FIRE_par_100ha_moy'], ap_metrics['Financement_par_ha'],
+                                              SCENARIO_QUANTILES, SCENARIO_QUANTILES)
+        counts = quadrant_counts(codes)
+        print(f"   Sensibilité aux seuils (quantile feux / quantile investissement) :")
+        print(f"      efficaces / naturellement protégées / sous pression / critiques")
+        for (_, sc), row in zip(scenarios.iterrows(), counts):
+            print(f"      q={sc['fire_quantile']:.2f} / {sc['invest_quantile']:.2f} : "
+                  f"{' / '.join(str(n) for n in row)}")
+        print()
+        
         # Top performers
         print(f"\n🏆 TOP 10 AP LES PLUS EFFICACES:")
         top_performers = ap_metrics.nlargest(10, 'Efficacite_Score')
@@ -460,7 +520,8 @@ class FinancementDeforestationAnalyzer:
             'correlation': self.results.get('global_correlation', {}),
             'yearly_trends': self.results.get('yearly_trends', pd.DataFrame()).to_dict('records') if 'yearly_trends' in self.results else [],
             'ap_segmentation': self.results.get('ap_segmentation', pd.DataFrame()).to_dict('records') if 'ap_segmentation' in self.results else [],
-            'ap_correlations': self.results.get('ap_correlations', pd.DataFrame()).to_dict('records') if 'ap_correlations' in self.results else []
+            'ap_correlations': self.results.get('ap_correlations', pd.DataFrame()).to_dict('records') if 'ap_correlations' in self.results else [],
+            'panel_lags': self.results['panel_lags'].replace({np.nan: None}).to_dict('records') if 'panel_lags' in self.results else []
         }
         
         output_path = self.data_path / "backend/data/analyse_financement_deforestation.json"
@@ -493,6 +554,9 @@ class FinancementDeforestationAnalyzer:
         # Phase 3 : Temporel
         self.analyse_temporelle(df)
         
+        # Phase 3 bis : Effets retardés (panel)
+        self.analyse_effets_retardes()
+        
         # Phase 4 : Segmentation
         self.segmentation_efficacite(df)
         
@@ -512,6 +576,14 @@ class FinancementDeforestationAnalyzer:
 
 
 if __name__ == "__main__":
-    analyzer = FinancementDeforestationAnalyzer()
+    parser = argparse.ArgumentParser(description="Analyse financement-déforestation")
+    parser.add_argument("--bootstrap", type=int, default=BOOTSTRAP,
+                        help="rééchantillonnages pour les IC des corrélations (0 = désactivé)")
+    parser.add_argument("--seed", type=int, default=BOOTSTRAP_SEED, help="graine du bootstrap")
+    parser.add_argument("--workers", type=int, default=1, help="processus pour le bootstrap")
+    args = parser.parse_args()
+    
+    analyzer = FinancementDeforestationAnalyzer(bootstrap=args.bootstrap, seed=args.seed,
+                                                workers=args.workers)
     analyzer.run_complete_analysis()
 
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Résolution des noms d'aires protégées vers le registre de référence
+Remplace les boucles de sous-chaînes et les appels process.extractOne :
+les noms sont normalisés, puis résolus dans l'ordre
+    1. correspondance exacte
+    2. table d'alias (ap_aliases.json, éditable à la main)
+    3. inclusion d'un nom dans l'autre (option containment)
+    4. similarité sur n-grammes de caractères, au-dessus d'un seuil
+Un index inversé n-gramme -> AP limite la comparaison aux candidats qui
+partagent au moins un n-gramme ; les scores sont calculés en bloc NumPy.
+
+Usage:
+    from ap_matching import APNameResolver
+    resolver = APNameResolver(coords["Key"], threshold=80)
+    resolver.resolve("Montagne des Français")       # -> "MONTAGNE DES FRANCAIS"
+    resolver.resolve_many(fund["Key"].unique())     # -> {nom: AP ou None}
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from name_normalizer import normalize_text
+
+ALIAS_PATH = Path(__file__).resolve().parent / "ap_aliases.json"
+DEFAULT_THRESHOLD = 80
+NGRAM = 3
+# Correspondance partielle : longueurs dans un rapport >= PARTIAL_RATIO, score x PARTIAL_WEIGHT
+PARTIAL_RATIO = 1.5
+PARTIAL_WEIGHT = 0.9
+TOKEN_SET_SCORE = 95
+
+
+def _ngrams(key, n=NGRAM):
+    padded = f" {key} "
+    if len(padded) < n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class APNameResolver:
+    """Index du registre d'AP : nom quelconque -> nom officiel du registre"""
+
+    def __init__(self, registry, threshold=DEFAULT_THRESHOLD, containment=False,
+                 alias_path=ALIAS_PATH, normalize=normalize_text):
+        self.threshold = threshold
+        self.containment = containment
+        self.normalize = normalize
+        self.alias_path = Path(alias_path) if alias_path else None
+
+        # Registre : clé normalisée -> premier nom d'origine rencontré
+        self.names = []
+        self.keys = []
+        self._by_key = {}
+        for name in registry:
+            key = normalize(name)
+            if key and key not in self._by_key:
+                self._by_key[key] = len(self.names)
+                self.names.append(name)
+                self.keys.append(key)
+        self._key_array = np.array(self.keys, dtype=str)
+
+        # Index inversé n-gramme -> identifiants d'AP
+        postings = {}
+        self._sizes = np.zeros(len(self.keys))
+        for i, key in enumerate(self.keys):
+            grams = _ngrams(key)
+            self._sizes[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(ids, dtype=np.intp) for gram, ids in postings.items()}
+
+        # Index inversé mot -> identifiants d'AP
+        token_postings = {}
+        self._token_counts = np.zeros(len(self.keys))
+        for i, key in enumerate(self.keys):
+            tokens = set(key.split())
+            self._token_counts[i] = len(tokens)
+            for token in tokens:
+                token_postings.setdefault(token, []).append(i)
+        self._token_postings = {t: np.array(ids, dtype=np.intp) for t, ids in token_postings.items()}
+
+        self.aliases = self._load_aliases()
+        self._memo = {}
+        self.stats = {"exact": 0, "alias": 0, "containment": 0, "fuzzy": 0, "unmatched": 0}
+
+    # ---------- Table d'alias ----------
+    def _load_aliases(self):
+        if self.alias_path is None or not self.alias_path.exists():
+            return {}
+        with open(self.alias_path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        return {self.normalize(alias): target for alias, target in raw.items()}
+
+    def add_alias(self, alias, target):
+        """Forcer la résolution d'un nom (target : nom du registre)"""
+        self.aliases[self.normalize(alias)] = target
+        self._memo.pop(self.normalize(alias), None)
+
+    def save_aliases(self):
+        """Écrire la table d'alias, triée, pour relecture humaine"""
+        if self.alias_path is None:
+            return
+        with open(self.alias_path, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(self.aliases.items())), f, indent=2, ensure_ascii=False)
+
+    # ---------- Similarité ----------
+    def _score_arrays(self, key):
+        """(score, dice) 0-100 contre tout le registre, en quelques passages NumPy"""
+        grams = _ngrams(key)
+        hits = [self._postings[g] for g in grams if g in self._postings]
+        overlap = np.zeros(len(self.keys))
+        if hits:
+            overlap = np.bincount(np.concatenate(hits), minlength=len(self.keys)).astype(float)
+        n = len(grams)
+        dice = 200.0 * overlap / (n + self._sizes)
+
+        # Nom nettement plus long que l'autre ("MIKEA" / "FORET DE MIKEA") :
+        # le recouvrement du plus court compte, pondéré (comme fuzz.WRatio)
+        shorter = np.minimum(n, self._sizes)
+        uneven = np.maximum(n, self._sizes) >= PARTIAL_RATIO * shorter
+        partial = np.where(uneven, PARTIAL_WEIGHT * 100.0 * overlap / shorter, 0.0)
+
+        # Tous les mots de l'un présents dans l'autre ("COMPLEXE TSIMEMBO ...")
+        tokens = set(key.split())
+        token_hits = [self._token_postings[t] for t in tokens if t in self._token_postings]
+        shared = np.zeros(len(self.keys))
+        if token_hits:
+            shared = np.bincount(np.concatenate(token_hits), minlength=len(self.keys))
+        subset = shared >= np.minimum(len(tokens), self._token_counts)
+        token_set = np.where(subset & (shared > 0), TOKEN_SET_SCORE, 0.0)
+
+        return np.maximum.reduce([dice, partial, token_set]), dice
+
+    def scores(self, key):
+        """Scores 0-100 du nom (déjà normalisé) contre tout le registre"""
+        return self._score_arrays(key)[0]
+
+    def _resolve_key(self, key):
+        if not key:
+            return None, "unmatched"
+        if key in self._by_key:
+            return self.names[self._by_key[key]], "exact"
+        # Un alias ne vaut que si sa cible appartient à ce registre
+        target = self._by_key.get(self.normalize(self.aliases[key])) if key in self.aliases else None
+        if target is not None:
+            return self.names[target], "alias"
+        if not self.keys:
+            return None, "unmatched"
+
+        scores, dice = self._score_arrays(key)
+        # Égalité de score : le nom le plus proche dans son ensemble l'emporte
+        ranking = scores + dice * 1e-3
+        if self.containment:
+            contained = ((np.char.find(self._key_array, key) >= 0)
+                         | (np.char.find(key, self._key_array) >= 0))
+            if contained.any():
+                best = int(np.argmax(np.where(contained, ranking, -1.0)))
+                return self.names[best], "containment"
+        best = int(np.argmax(ranking))
+        if scores[best] >= self.threshold:
+            return self.names[best], "fuzzy"
+        return None, "unmatched"
+
+    def resolve(self, name):
+        """Nom du registre correspondant, None si aucun ne dépasse le seuil"""
+        key = self.normalize(name)
+        if key not in self._memo:
+            match, how = self._resolve_key(key)
+            self.stats[how] += 1
+            self._memo[key] = match
+        return self._memo[key]
+
+    def resolve_many(self, names):
+        """{nom: nom du registre ou None} ; chaque nom distinct n'est résolu qu'une fois"""
+        return {name: self.resolve(name) for name in dict.fromkeys(names)}
+
+    def learn_aliases(self):
+        """Ajouter à la table les correspondances approchées trouvées jusqu'ici"""
+        for key, match in self._memo.items():
+            if match is not None and key not in self._by_key and key not in self.aliases:
+                self.aliases[key] = match
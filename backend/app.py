@@ -6,12 +6,17 @@ API pour servir les données géographiques et statistiques
 
 from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
-import json
-import pandas as pd
 from pathlib import Path
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
+import threading
+
+from yearly_cache import YearlyCache
+from data_snapshot import load_document, source_signature
+from data_watcher import DataWatcher, RELOAD_INTERVAL
+from response_cache import ResponseCache, cached_json, install_conditional_get, install_compression
+from compression import COMPRESS_MIN_SIZE
 
 # Import conditionnel de geopandas
 try:
@@ -27,23 +32,125 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)  # Permettre les requêtes cross-origin
+# Taille minimale (octets) avant compression gzip/Brotli des réponses
+app.config['COMPRESS_MIN_SIZE'] = COMPRESS_MIN_SIZE
 
 # Configuration
 DATA_PATH = Path("data")
 STATIC_PATH = Path("static")
 YEARLY_CSV = DATA_PATH / "unified_yearly.csv"
+# Snapshot binaire écrit par les processeurs ; les fichiers texte servent de repli
+SNAPSHOT_PATH = DATA_PATH / "snapshot"
+
+class DashboardSnapshot:
+    """Données du dashboard et structures dérivées, construites d'un bloc
+
+    Un snapshot n'est jamais modifié après publication : un rechargement en
+    construit un nouveau puis remplace la référence (échange atomique).
+    """
+
+    def __init__(self, data, version, mtime, signature=None):
+        self.data = data
+        # version : empreinte du contenu chargé (identique d'un processus à l'autre)
+        # loaded_at : horodatage des données, utilisé comme champ "timestamp"
+        self.version = version
+        self.mtime = mtime
+        self.signature = signature
+        self.loaded_at = datetime.fromtimestamp(mtime).isoformat()
+        self.funding_years, self.funding_matrix = self.build_funding_matrix(data)
+        self._grid_rates = {}
+        # Années disponibles dans la grille (colonnes deforestation_<année>), calculées au premier appel
+        self._grid_years = None
+
+    @staticmethod
+    def build_funding_matrix(data):
+        """Pivot des financements annuels des AP : (années, matrice AP x année)
+
+        Reprend la règle historique : financement_{année}, sinon investment_{année}, sinon 0.
+        """
+        areas = data.get("protected_areas", {}).get("data", [])
+        years = sorted({
+            key.split('_')[-1]
+            for area in areas for key in area
+            if key.startswith(('financement_', 'investment_')) and key.split('_')[-1].isdigit()
+        })
+        matrix = np.zeros((len(areas), len(years)))
+        for i, area in enumerate(areas):
+            for j, year in enumerate(years):
+                matrix[i, j] = float(area.get(f'financement_{year}', 0) or area.get(f'investment_{year}', 0) or 0)
+        return years, matrix
+
+    def grid_rates(self, year):
+        """Taux de déforestation des cellules pour une année, en tableau NumPy (mémoïsé)
+
+        Une année absente des colonnes deforestation_<année> (dont 'total') donne
+        total_deforestation pour toutes les cellules : une seule entrée mémoïsée,
+        quelle que soit la valeur de ?year= reçue.
+        """
+        cells = self.data.get("grid_data", {}).get("data", [])
+        if self._grid_years is None:
+            self._grid_years = {
+                key[len('deforestation_'):] for cell in cells for key in cell
+                if key.startswith('deforestation_')
+            }
+        if year not in self._grid_years:
+            year = None
+        rates = self._grid_rates.get(year)
+        if rates is None:
+            key = f'deforestation_{year}'
+            rates = np.array(
+                [cell.get(key, cell.get('total_deforestation', 0)) if year is not None
+                 else cell.get('total_deforestation', 0) for cell in cells],
+                dtype=float
+            )
+            self._grid_rates[year] = rates
+        return rates
+
 
 class DashboardAPI:
     def __init__(self):
-        self.data = self.load_dashboard_data()
-        
+        self.data_file = DATA_PATH / "dashboard_data.json"
+        self._lock = threading.Lock()
+        self.snapshot = self.load_dashboard_data()
+
+    # Accès au snapshot courant (une vue doit lire api.snapshot une seule fois)
+    data = property(lambda self: self.snapshot.data)
+    version = property(lambda self: self.snapshot.version)
+    mtime = property(lambda self: self.snapshot.mtime)
+    loaded_at = property(lambda self: self.snapshot.loaded_at)
+
+    def file_signature(self):
+        """(mtime_ns, taille) du snapshot (ou de dashboard_data.json), None si absent"""
+        return source_signature(self.data_file, SNAPSHOT_PATH)
+
+    def loaded_signature(self):
+        return self.snapshot.signature
+
+    def read_snapshot(self):
+        """Lire les données du dashboard en un nouveau snapshot (lève une exception si illisible)"""
+        signature = self.file_signature()
+        data, digest = load_document("dashboard", self.data_file, SNAPSHOT_PATH)
+        if signature != self.file_signature():
+            raise IOError("Données du dashboard modifiées pendant la lecture")
+        return DashboardSnapshot(data, digest, signature[0] / 1e9, signature)
+
+    def reload(self):
+        """Construire un nouveau snapshot hors du chemin des requêtes puis l'échanger.
+
+        En cas d'erreur (fichier en cours d'écriture, JSON invalide), l'ancien
+        snapshot reste en service et l'exception est propagée.
+        """
+        with self._lock:
+            snapshot = self.read_snapshot()
+            self.snapshot = snapshot
+        logger.info(f"🔄 Données du dashboard rechargées (version {snapshot.version})")
+        return snapshot
+
     def load_dashboard_data(self):
         """Charger les données du dashboard"""
         try:
-            data_file = DATA_PATH / "dashboard_data.json"
-            if data_file.exists():
-                with open(data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            if self.file_signature() is not None:
+                return self.read_snapshot()
             else:
                 logger.warning("Fichier de données non trouvé, génération de données par défaut")
                 return self.generate_default_data()
@@ -54,7 +161,8 @@ class DashboardAPI:
     def generate_default_data(self):
         """Générer des données par défaut si les vraies données ne sont pas disponibles"""
         print("⚠️ Utilisation de données par défaut - les vraies données ne sont pas disponibles")
-        return {
+        now = datetime.now().timestamp()
+        data = {
             "protected_areas": {
                 "analysis": {
                     "total_areas": 15,
@@ -99,17 +207,104 @@ class DashboardAPI:
                 "avg_deforestation_rate": 0.12
             }
         }
+        return DashboardSnapshot(data, f"default-{now:.0f}", now)
 
 # Instance de l'API
 api = DashboardAPI()
 
+def parse_pagination():
+    """Lire ?limit=&cursor= (cursor : position de départ, renvoyée par next_cursor)"""
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor', 0, type=int)
+    if limit is not None and limit <= 0:
+        raise ValueError("limit doit être un entier positif")
+    if cursor < 0:
+        raise ValueError("cursor doit être un entier positif ou nul")
+    return limit, cursor
+
+def parse_fields(available):
+    """Lire ?fields=a,b,c ; None = toutes les colonnes"""
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in available]
+    if unknown:
+        raise ValueError(f"Champs inconnus: {', '.join(unknown)}")
+    return fields
+
+def parse_format():
+    """Lire ?format=records (défaut, liste de dicts) ou ?format=columnar ({colonne: [valeurs]})"""
+    fmt = request.args.get('format', 'records')
+    if fmt not in ('records', 'columnar'):
+        raise ValueError("format doit valoir 'records' ou 'columnar'")
+    return fmt
+
+def shape_columns(columns, fmt):
+    """Mettre en forme des colonnes {nom: liste} selon le format demandé"""
+    if fmt == 'columnar':
+        return columns
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+def nan_to_none(values):
+    """Liste JSON d'un tableau NumPy (NaN -> null)"""
+    return [None if np.isnan(v) else float(v) for v in values]
+
+def column_mean(matrix):
+    """Moyenne par colonne en ignorant les NaN (NaN si colonne vide)"""
+    counts = (~np.isnan(matrix)).sum(axis=0)
+    sums = np.nansum(matrix, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def page_bounds(total, limit, cursor):
+    """(début, fin, next_cursor) de la page demandée"""
+    stop = total if limit is None else min(total, cursor + limit)
+    start = min(cursor, stop)
+    return start, stop, (stop if stop < total else None)
+
+# Cache du tableau annuel (relu seulement si le fichier change)
+yearly_cache = YearlyCache(YEARLY_CSV, snapshot_root=SNAPSHOT_PATH)
+
 def load_yearly_df():
-    if YEARLY_CSV.exists():
-        try:
-            return pd.read_csv(YEARLY_CSV)
-        except Exception as e:
-            logger.error(f"Erreur lecture unified_yearly.csv: {e}")
-    return pd.DataFrame()
+    return yearly_cache.get()
+
+def data_version():
+    """Version des données servies : JSON du dashboard + tableau annuel chargés"""
+    return f"{api.version}:{yearly_cache.current_signature()}"
+
+def data_last_modified():
+    """Date de modification la plus récente des données chargées"""
+    mtimes = [api.mtime or 0]
+    signature = yearly_cache.current_signature()
+    if signature:
+        mtimes.append(signature[0] / 1e9)
+    return datetime.fromtimestamp(int(max(mtimes)), tz=timezone.utc)
+
+# Corps JSON pré-sérialisés (et leurs variantes compressées), vidés si les données changent
+response_cache = ResponseCache()
+cache_response = cached_json(response_cache, data_version)
+
+# ETag / Last-Modified sur toutes les routes de l'API (304 sans exécuter la vue)
+install_conditional_get(app, data_version, data_last_modified,
+                        exclude=('static', 'index', 'get_cache_stats'))
+install_compression(app)
+
+# Rechargement à chaud : un thread relit les fichiers modifiés hors des requêtes
+data_watcher = None
+
+def start_data_watcher(interval=RELOAD_INTERVAL):
+    """Démarrer la surveillance des fichiers de données (une fois par processus)"""
+    global data_watcher
+    if interval <= 0 or (data_watcher is not None and data_watcher.is_alive()):
+        return data_watcher
+    # Le watcher publie les nouveaux index : plus de stat() à chaque requête
+    yearly_cache.auto_reload = False
+    data_watcher = DataWatcher([api, yearly_cache], interval=interval)
+    data_watcher.start()
+    logger.info(f"👀 Surveillance des données toutes les {interval:g}s")
+    return data_watcher
 
 @app.route('/')
 def index():
@@ -117,28 +312,32 @@ def index():
     return send_from_directory(STATIC_PATH, 'index.html')
 
 @app.route('/api/summary')
+@cache_response
 def get_summary():
     """Obtenir les statistiques de résumé"""
     try:
+        snap = api.snapshot
         return jsonify({
             "success": True,
-            "data": api.data["summary_stats"],
-            "timestamp": datetime.now().isoformat()
+            "data": snap.data["summary_stats"],
+            "timestamp": snap.loaded_at
         })
     except Exception as e:
         logger.error(f"Erreur dans get_summary: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/protected-areas')
+@cache_response
 def get_protected_areas():
     """Obtenir les données des aires protégées"""
     try:
+        snap = api.snapshot
         # Paramètres de filtrage
         area_type = request.args.get('type')
         min_area = request.args.get('min_area', type=float)
         max_area = request.args.get('max_area', type=float)
         
-        data = api.data["protected_areas"]["data"]
+        data = snap.data["protected_areas"]["data"]
         
         # Appliquer les filtres
         if area_type:
@@ -153,63 +352,88 @@ def get_protected_areas():
         return jsonify({
             "success": True,
             "data": data,
-            "analysis": api.data["protected_areas"]["analysis"],
+            "analysis": snap.data["protected_areas"]["analysis"],
             "filters_applied": {
                 "type": area_type,
                 "min_area": min_area,
                 "max_area": max_area
             },
-            "timestamp": datetime.now().isoformat()
+            "timestamp": snap.loaded_at
         })
     except Exception as e:
         logger.error(f"Erreur dans get_protected_areas: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/deforestation')
+@cache_response
 def get_deforestation():
     """Obtenir les données de déforestation (tolère l'absence de grid_data)"""
     try:
+        snap = api.snapshot
         # Paramètres de filtrage
         min_rate = request.args.get('min_rate', type=float)
         max_rate = request.args.get('max_rate', type=float)
         year = request.args.get('year', 'total')
 
         # Si grid_data n'existe pas, retourner une liste vide pour ne pas casser le frontend
-        if "grid_data" not in api.data or "data" not in api.data["grid_data"]:
+        if "grid_data" not in snap.data or "data" not in snap.data["grid_data"]:
             return jsonify({
                 "success": True,
                 "data": [],
                 "analysis": {"total_cells": 0, "columns": []},
                 "filters_applied": {"min_rate": min_rate, "max_rate": max_rate, "year": year},
-                "timestamp": datetime.now().isoformat()
+                "total": 0,
+                "count": 0,
+                "next_cursor": None,
+                "timestamp": snap.loaded_at
             })
 
-        data = api.data["grid_data"]["data"]
+        limit, cursor = parse_pagination()
+        data = snap.data["grid_data"]["data"]
+        analysis = snap.data["grid_data"].get("analysis", {})
+        fields = parse_fields(set(analysis.get("columns", [])) | set(data[0] if data else {}))
 
-        # Appliquer les filtres
+        # Appliquer les filtres sur le tableau des taux (sans parcourir les cellules)
+        rates = snap.grid_rates(year)
+        mask = np.ones(len(rates), dtype=bool)
         if min_rate is not None:
-            data = [cell for cell in data if cell.get(f'deforestation_{year}', cell.get('total_deforestation', 0)) >= min_rate]
+            mask &= rates >= min_rate
         if max_rate is not None:
-            data = [cell for cell in data if cell.get(f'deforestation_{year}', cell.get('total_deforestation', 0)) <= max_rate]
+            mask &= rates <= max_rate
+        positions = np.flatnonzero(mask)
+
+        total = len(positions)
+        lo, hi, next_cursor = page_bounds(total, limit, cursor)
+        page = [data[i] for i in positions[lo:hi]]
+        if fields is not None:
+            page = [{f: cell.get(f) for f in fields} for cell in page]
 
         return jsonify({
             "success": True,
-            "data": data,
-            "analysis": api.data["grid_data"].get("analysis", {}),
+            "data": page,
+            "analysis": analysis,
             "filters_applied": {"min_rate": min_rate, "max_rate": max_rate, "year": year},
-            "timestamp": datetime.now().isoformat()
+            "total": total,
+            "count": len(page),
+            "next_cursor": next_cursor,
+            "timestamp": snap.loaded_at
         })
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         logger.error(f"Erreur dans get_deforestation: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/correlation')
+@cache_response
 def get_correlation():
     """Corrélation simple: financement total vs indicateur pression (feux/ha ou 1-score)"""
     try:
-        protected_areas = api.data["protected_areas"]["data"]
+        snap = api.snapshot
+        fmt = parse_format()
+        protected_areas = snap.data["protected_areas"]["data"]
 
-        points = []
+        xs, ys, names = [], [], []
         for area in protected_areas:
             inv = area.get('total_financement') or area.get('total_investment') or 0
             pressure = area.get('fire_par_100ha')
@@ -217,102 +441,168 @@ def get_correlation():
                 score = area.get('score_global')
                 pressure = (1 - score) if score is not None else None
             if pressure is not None:
-                points.append({"x": inv, "y": pressure, "area_name": area.get('name')})
+                xs.append(inv)
+                ys.append(pressure)
+                names.append(area.get('name'))
 
         corr = None
-        if len(points) >= 2:
-            x = np.array([p["x"] for p in points], dtype=float)
-            y = np.array([p["y"] for p in points], dtype=float)
+        if len(xs) >= 2:
+            x = np.array(xs, dtype=float)
+            y = np.array(ys, dtype=float)
             if x.std() > 0 and y.std() > 0:
                 corr = float(np.corrcoef(x, y)[0, 1])
 
         return jsonify({
             "success": True,
-            "data": points,
-            "summary": {"avg_correlation": corr, "total_areas_analyzed": len(points)},
-            "timestamp": datetime.now().isoformat()
+            "data": shape_columns({"x": xs, "y": ys, "area_name": names}, fmt),
+            "summary": {"avg_correlation": corr, "total_areas_analyzed": len(xs)},
+            "timestamp": snap.loaded_at
         })
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         logger.error(f"Erreur dans get_correlation: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/trends')
+@cache_response
 def get_trends():
     """Obtenir les tendances temporelles à partir des champs disponibles"""
     try:
-        years_set = set()
-        for area in api.data["protected_areas"]["data"]:
-            for key in area.keys():
-                if key.startswith('financement_') or key.startswith('investment_'):
-                    y = key.split('_')[-1]
-                    if y.isdigit():
-                        years_set.add(y)
-        years = sorted(list(years_set)) or ['2020', '2021', '2022', '2023']
-
-        investment_trends = []
-        for year in years:
-            total = 0.0
-            for area in api.data["protected_areas"]["data"]:
-                total += area.get(f'financement_{year}', 0) or area.get(f'investment_{year}', 0) or 0
-            avg = total / max(1, len(api.data["protected_areas"]["data"]))
-            investment_trends.append({"year": year, "total_investment": total, "avg_investment_per_area": avg})
-
-        deforestation_trends = [{"year": y, "avg_deforestation_rate": None, "total_deforestation": None} for y in years]
+        snap = api.snapshot
+        fmt = parse_format()
+        index = yearly_cache.get_index()
+        yearly_years = [str(y) for y in index.pivot_years.tolist()]
+
+        # Investissements : réductions par colonne de la matrice AP x année
+        if snap.funding_years:
+            years, matrix = snap.funding_years, snap.funding_matrix
+        elif 'Financement_annuel_USD' in index.pivots:
+            years, matrix = yearly_years, np.nan_to_num(index.pivots['Financement_annuel_USD'])
+        else:
+            years = ['2020', '2021', '2022', '2023']
+            matrix = np.zeros((len(snap.data["protected_areas"]["data"]), len(years)))
+        totals = matrix.sum(axis=0)
+        investment_trends = {
+            "year": years,
+            "total_investment": totals.tolist(),
+            "avg_investment_per_area": (totals / max(1, matrix.shape[0])).tolist()
+        }
+
+        # Déforestation : pertes de couvert (FCL) et feux depuis unified_yearly.csv
+        if 'FCL_pct_surface' in index.pivots:
+            fcl_pct = index.pivots['FCL_pct_surface']
+            surface = index.pivots.get('Superficie_ha', np.full(fcl_pct.shape, np.nan))
+            fire = index.pivots.get('FIRE_par_100ha_moy', np.full(fcl_pct.shape, np.nan))
+            fcl_ha = fcl_pct / 100 * surface
+            total_fcl = np.where((~np.isnan(fcl_ha)).any(axis=0), np.nansum(fcl_ha, axis=0), np.nan)
+            deforestation_trends = {
+                "year": yearly_years,
+                "avg_deforestation_rate": nan_to_none(column_mean(fcl_pct)),
+                "total_deforestation": nan_to_none(total_fcl),
+                "avg_fire_rate": nan_to_none(column_mean(fire))
+            }
+        else:
+            deforestation_trends = {"year": years, "avg_deforestation_rate": [None] * len(years),
+                                    "total_deforestation": [None] * len(years)}
 
         return jsonify({
             "success": True,
-            "data": {"investment_trends": investment_trends, "deforestation_trends": deforestation_trends},
-            "timestamp": datetime.now().isoformat()
+            "data": {
+                "investment_trends": shape_columns(investment_trends, fmt),
+                "deforestation_trends": shape_columns(deforestation_trends, fmt)
+            },
+            "timestamp": snap.loaded_at
         })
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         logger.error(f"Erreur dans get_trends: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/aps')
+@cache_response
 def list_aps():
     """Lister les AP disponibles (terrestres) depuis unified_yearly.csv"""
     try:
+        snap = api.snapshot
         df = load_yearly_df()
         if df.empty:
-            names = sorted({a.get('name') for a in api.data.get('protected_areas', {}).get('data', []) if a.get('name')})
+            names = sorted({a.get('name') for a in snap.data.get('protected_areas', {}).get('data', []) if a.get('name')})
             return jsonify({"success": True, "data": names})
-        names = sorted(df['AP_Name'].dropna().unique().tolist())
+        names = sorted(df['AP_Name'].cat.categories.tolist())
         return jsonify({"success": True, "data": names})
     except Exception as e:
         logger.error(f"Erreur dans /api/aps: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/yearly')
+@cache_response
 def get_yearly():
-    """Tableau annuel unifié avec filtres ?ap=...&start=2007&end=2023"""
+    """Tableau annuel unifié avec filtres ?ap=...&start=2007&end=2023
+
+    Pagination ?limit=&cursor=, projection ?fields=AP_Name,Année,...
+    et ?format=columnar pour recevoir {colonne: [valeurs]}
+    """
     try:
         ap = request.args.get('ap')
         start = request.args.get('start', type=int)
         end = request.args.get('end', type=int)
-        df = load_yearly_df()
-        if df.empty:
-            return jsonify({"success": True, "data": [], "count": 0})
-        if ap:
-            df = df[df['AP_Name'].str.upper() == ap.upper()]
-        if start:
-            df = df[df['Année'] >= start]
-        if end:
-            df = df[df['Année'] <= end]
-        df = df.sort_values(['Année'])
+        limit, cursor = parse_pagination()
+        fmt = parse_format()
+        index = yearly_cache.get_index()
+        if index.df.empty:
+            return jsonify({"success": True, "data": [], "count": 0, "total": 0, "next_cursor": None})
+        fields = parse_fields(index.df.columns)
+
+        # Total et années calculés sur les positions, sans matérialiser les lignes
+        positions = index.locate(ap, start, end)
+        total = index.count(positions)
+        years = np.unique(index.years[positions]).tolist()
+        lo, hi, next_cursor = page_bounds(total, limit, cursor)
+        if isinstance(positions, slice):
+            page_positions = slice(positions.start + lo, positions.start + hi)
+        else:
+            page_positions = positions[lo:hi]
+        df = index.df.iloc[page_positions]
+        if fields is not None:
+            df = df[fields]
+
+        if fmt == 'columnar':
+            # Directement depuis les colonnes NumPy, sans dict par ligne
+            data = {col: df[col].to_numpy().tolist() for col in df.columns}
+        else:
+            data = df.to_dict(orient='records')
+
         return jsonify({
             "success": True,
-            "data": df.to_dict(orient='records'),
-            "years": sorted(df['Année'].unique().tolist()),
-            "count": len(df)
+            "data": data,
+            "years": years,
+            "count": len(df),
+            "total": total,
+            "next_cursor": next_cursor
         })
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         logger.error(f"Erreur dans /api/yearly: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/cache/stats')
+def get_cache_stats():
+    """Compteurs des caches (tableau annuel et réponses sérialisées)"""
+    return jsonify({"success": True, "data": {
+        "yearly": yearly_cache.get_stats(),
+        "responses": response_cache.get_stats(),
+        "watcher": data_watcher.stats if data_watcher is not None else None,
+    }})
+
 @app.route('/api/geojson/protected-areas')
+@cache_response
 def get_protected_areas_geojson():
     """Obtenir les aires protégées en format GeoJSON"""
     try:
+        snap = api.snapshot
         # Simuler des données GeoJSON pour la démonstration
         geojson = {
             "type": "FeatureCollection",
@@ -337,7 +627,7 @@ def get_protected_areas_geojson():
                         ]]
                     }
                 }
-                for i, area in enumerate(api.data["protected_areas"]["data"])
+                for i, area in enumerate(snap.data["protected_areas"]["data"])
             ]
         }
         
@@ -367,5 +657,7 @@ if __name__ == '__main__':
     print("  - GET /api/correlation - Analyse de corrélation")
     print("  - GET /api/trends - Tendances temporelles")
     print("  - GET /api/geojson/protected-areas - GeoJSON des aires protégées")
+    print("  - GET /api/cache/stats - Statistiques du cache")
     
+    start_data_watcher()
     app.run(debug=True, host='0.0.0.0', port=5001)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Compression négociée des réponses (gzip / Brotli)
+Sans dépendance à Flask : utilisé par app.py et http_server.py.
+"""
+
+import gzip
+import os
+
+# Import conditionnel de brotli
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# En dessous de ce seuil (octets), la compression ne vaut pas son coût CPU
+COMPRESS_MIN_SIZE = int(os.environ.get("DASHBOARD_COMPRESS_MIN_SIZE", 1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def supported_encodings():
+    """Encodages proposés, par ordre de préférence du serveur"""
+    return ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding):
+    """Choisir l'encodage à partir de l'en-tête Accept-Encoding (None = identité)"""
+    if not accept_encoding:
+        return None
+    qualities = {}
+    for part in accept_encoding.split(","):
+        fields = part.strip().split(";")
+        coding = fields[0].strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in supported_encodings():
+        q = qualities.get(coding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress_bytes(body, encoding):
+    """Compresser un corps déjà encodé"""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        # mtime=0 : sortie déterministe, réutilisable d'une requête à l'autre
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+def choose_encoding(body, accept_encoding, min_size=None):
+    """Encodage à appliquer à ce corps (None si trop petit ou non accepté)"""
+    threshold = COMPRESS_MIN_SIZE if min_size is None else min_size
+    if len(body) < threshold:
+        return None
+    return negotiate_encoding(accept_encoding)
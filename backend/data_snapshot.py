@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Snapshot binaire colonnaire des données du pipeline
+Les processeurs écrivent une version typée des tables (une colonne par
+fichier .npy, ouvert en mémoire mappée) et des documents JSON compacts ;
+l'API et les scripts d'analyse l'ouvrent sans analyse de texte.
+unified_yearly.csv et dashboard_data.json restent des exports optionnels.
+
+Arborescence (sous backend/data/snapshot) :
+    CURRENT                 nom de la version courante (remplacé atomiquement)
+    <version>/manifest.json tables, colonnes, types, catégories, empreintes
+    <version>/<table>.<i>.npy
+    <version>/<document>.json
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+SNAPSHOT_DIR = Path(__file__).resolve().parent / "data" / "snapshot"
+# Versions conservées : un lecteur peut encore ouvrir la précédente
+KEEP_VERSIONS = 3
+# Exports texte (CSV / JSON indenté) à côté du snapshot ; 0 pour les désactiver
+TEXT_EXPORTS = os.environ.get("DASHBOARD_TEXT_EXPORTS", "1") != "0"
+
+
+def _current_file(root):
+    return Path(root) / "CURRENT"
+
+
+def snapshot_signature(root=SNAPSHOT_DIR):
+    """(mtime_ns, taille) du pointeur CURRENT, None sans snapshot"""
+    try:
+        st = _current_file(root).stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def source_signature(fallback_path, root=SNAPSHOT_DIR):
+    """Signature de la source servie : le snapshot s'il existe, sinon le fichier texte"""
+    signature = snapshot_signature(root)
+    if signature is not None:
+        return signature
+    try:
+        st = Path(fallback_path).stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _encode_column(series):
+    """Tableau NumPy typé + métadonnées (catégories) pour une colonne"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        cat = series.cat
+    elif series.dtype == bool or pd.api.types.is_numeric_dtype(series.dtype):
+        values = series.to_numpy()
+        if values.dtype == object:
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        return values, {"dtype": values.dtype.str}
+    else:
+        cat = series.astype("category").cat
+    categories = cat.categories
+    codes = cat.codes.to_numpy()
+    # Codes sur 16 bits tant que les catégories le permettent
+    if len(categories) < np.iinfo(np.int16).max:
+        codes = codes.astype(np.int16)
+    meta = {
+        "dtype": codes.dtype.str,
+        "categories": [c.item() if hasattr(c, "item") else c for c in categories],
+    }
+    return codes, meta
+
+
+def _write_table(version_dir, name, df):
+    columns = []
+    digest = hashlib.sha1()
+    for i, col in enumerate(df.columns):
+        values, meta = _encode_column(df[col])
+        filename = f"{name}.{i}.npy"
+        np.save(version_dir / filename, np.ascontiguousarray(values), allow_pickle=False)
+        digest.update(str(col).encode("utf-8"))
+        digest.update(values.tobytes())
+        digest.update(json.dumps(meta, default=str).encode("utf-8"))
+        columns.append({"name": str(col), "file": filename, **meta})
+    return {"kind": "table", "rows": len(df), "columns": columns, "sha1": digest.hexdigest()[:16]}
+
+
+def _write_document(version_dir, name, document):
+    raw = json.dumps(document, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+    filename = f"{name}.json"
+    (version_dir / filename).write_bytes(raw)
+    return {"kind": "document", "file": filename, "bytes": len(raw),
+            "sha1": hashlib.sha1(raw).hexdigest()[:16]}
+
+
+def _entry_files(entry):
+    if entry["kind"] == "table":
+        return [c["file"] for c in entry["columns"]]
+    return [entry["file"]]
+
+
+def write_snapshot(tables=None, documents=None, root=SNAPSHOT_DIR):
+    """Publier une nouvelle version ; les entrées non fournies sont reprises de la courante.
+
+    La version est écrite dans son propre dossier puis CURRENT est remplacé
+    par os.replace : un lecteur voit l'ancienne ou la nouvelle, jamais un mélange.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    previous = open_snapshot(root)
+
+    staging = root / f".tmp-{os.getpid()}-{time.time_ns()}"
+    staging.mkdir()
+    try:
+        entries = {}
+        if previous is not None:
+            for name, entry in previous.manifest["entries"].items():
+                for filename in _entry_files(entry):
+                    src, dst = previous.path / filename, staging / filename
+                    try:
+                        os.link(src, dst)
+                    except OSError:
+                        shutil.copy2(src, dst)
+                entries[name] = entry
+        # Les fichiers repris sont des liens physiques : les retirer avant de réécrire
+        for name in {**(tables or {}), **(documents or {})}:
+            if name in entries:
+                for filename in _entry_files(entries.pop(name)):
+                    (staging / filename).unlink()
+        for name, df in (tables or {}).items():
+            entries[name] = _write_table(staging, name, df)
+        for name, document in (documents or {}).items():
+            entries[name] = _write_document(staging, name, document)
+
+        version = hashlib.sha1(
+            "|".join(f"{name}:{entries[name]['sha1']}" for name in sorted(entries)).encode("utf-8")
+        ).hexdigest()[:16]
+        manifest = {
+            "format": FORMAT_VERSION,
+            "version": version,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "entries": entries,
+        }
+        (staging / "manifest.json").write_text(json.dumps(manifest, indent=2, default=str), encoding="utf-8")
+
+        version_dir = root / version
+        if version_dir.exists():
+            shutil.rmtree(staging)
+        else:
+            os.replace(staging, version_dir)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer = root / f".CURRENT-{os.getpid()}"
+    pointer.write_text(version, encoding="utf-8")
+    os.replace(pointer, _current_file(root))
+    _prune(root, keep=version)
+    logger.info(f"📦 Snapshot {version} publié ({', '.join(sorted(entries))})")
+    return version
+
+
+def _prune(root, keep):
+    """Supprimer les versions les plus anciennes au-delà de KEEP_VERSIONS"""
+    versions = sorted(
+        (p for p in root.iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime,
+    )
+    for path in versions[:-KEEP_VERSIONS]:
+        if path.name != keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class Snapshot:
+    """Version ouverte du snapshot (lecture seule côté fichiers)"""
+
+    def __init__(self, path, manifest):
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest["version"]
+
+    def entry(self, name):
+        return self.manifest["entries"].get(name)
+
+    def has(self, name):
+        return name in self.manifest["entries"]
+
+    def table(self, name, columns=None, mmap=True):
+        """DataFrame typé ; les colonnes sont mappées en mémoire (copie à l'écriture)"""
+        entry = self.manifest["entries"][name]
+        data = {}
+        for col in entry["columns"]:
+            if columns is not None and col["name"] not in columns:
+                continue
+            values = np.load(self.path / col["file"], mmap_mode="c" if mmap else None,
+                             allow_pickle=False)
+            if "categories" in col:
+                values = pd.Categorical.from_codes(values, categories=col["categories"])
+            data[col["name"]] = values
+        return pd.DataFrame(data, copy=False)
+
+    def document(self, name):
+        entry = self.manifest["entries"][name]
+        return json.loads((self.path / entry["file"]).read_bytes().decode("utf-8"))
+
+
+def open_snapshot(root=SNAPSHOT_DIR):
+    """Ouvrir la version courante, None s'il n'y a pas de snapshot lisible"""
+    root = Path(root)
+    try:
+        version = _current_file(root).read_text(encoding="utf-8").strip()
+        path = root / version
+        manifest = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != FORMAT_VERSION:
+        logger.warning(f"⚠️ Snapshot {version} au format {manifest.get('format')}, ignoré")
+        return None
+    return Snapshot(path, manifest)
+
+
+def load_table(name, csv_path, root=SNAPSHOT_DIR, **read_csv_kwargs):
+    """Table depuis le snapshot, sinon depuis l'export CSV"""
+    snapshot = open_snapshot(root)
+    if snapshot is not None and snapshot.has(name):
+        return snapshot.table(name)
+    return pd.read_csv(csv_path, **read_csv_kwargs)
+
+
+def load_document(name, json_path, root=SNAPSHOT_DIR):
+    """(document, empreinte) depuis le snapshot, sinon depuis l'export JSON"""
+    snapshot = open_snapshot(root)
+    if snapshot is not None and snapshot.has(name):
+        return snapshot.document(name), snapshot.entry(name)["sha1"]
+    raw = Path(json_path).read_bytes()
+    return json.loads(raw.decode("utf-8")), hashlib.sha1(raw).hexdigest()[:16]
+
+
+def save_outputs(output_path, yearly_df=None, dashboard=None, exports=None):
+    """Écrire les sorties d'un processeur : snapshot, puis exports texte optionnels
+
+    Le tableau annuel est typé comme dans le cache de l'API (yearly_cache) :
+    les lecteurs l'ouvrent tel quel, sans conversion.
+    """
+    from yearly_cache import type_yearly_frame
+
+    output_path = Path(output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+    exports = TEXT_EXPORTS if exports is None else exports
+
+    if exports:
+        if dashboard is not None:
+            with open(output_path / "dashboard_data.json", "w", encoding="utf-8") as f:
+                json.dump(dashboard, f, indent=2, default=str)
+        if yearly_df is not None:
+            yearly_df.to_csv(output_path / "unified_yearly.csv", index=False)
+
+    tables = {"yearly": type_yearly_frame(yearly_df)} if yearly_df is not None else None
+    # Passage par JSON : types NumPy et dates convertis comme dans l'export texte
+    documents = ({"dashboard": json.loads(json.dumps(dashboard, default=str))}
+                 if dashboard is not None else None)
+    return write_snapshot(tables, documents, root=output_path / "snapshot")
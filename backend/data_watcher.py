@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Surveillance des fichiers de données et rechargement à chaud
+Un thread d'arrière-plan détecte les nouveaux fichiers, attend que leur
+écriture soit terminée, construit les nouvelles structures hors du chemin
+des requêtes, puis les sources échangent leur snapshot d'un bloc.
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de scrutation (s) ; 0 désactive le rechargement à chaud
+RELOAD_INTERVAL = float(os.environ.get("DASHBOARD_RELOAD_INTERVAL", 2))
+# Délai pendant lequel un fichier doit rester inchangé avant d'être relu
+SETTLE_DELAY = float(os.environ.get("DASHBOARD_RELOAD_SETTLE", 1))
+
+
+class DataWatcher(threading.Thread):
+    """Thread démon qui recharge les sources dont le fichier a changé.
+
+    Une source expose file_signature(), loaded_signature() et reload().
+    """
+
+    def __init__(self, sources, interval=RELOAD_INTERVAL, settle=SETTLE_DELAY, on_reload=None):
+        super().__init__(name="data-watcher", daemon=True)
+        self.sources = list(sources)
+        self.interval = interval
+        self.settle = settle
+        self.on_reload = on_reload
+        self._stop_event = threading.Event()
+        # Signature en échec par source : pas de nouvel essai tant que le fichier ne change pas
+        self._failed = {}
+        self.stats = {"checks": 0, "reloads": 0, "errors": 0}
+
+    def stop(self):
+        self._stop_event.set()
+
+    def check(self):
+        """Un passage de vérification ; renvoie le nombre de sources rechargées"""
+        self.stats["checks"] += 1
+        reloaded = 0
+        for source in self.sources:
+            signature = source.file_signature()
+            if signature is None or signature == source.loaded_signature():
+                continue
+            if self._failed.get(id(source)) == signature:
+                continue
+            # Fichier en cours d'écriture : attendre qu'il soit stable
+            time.sleep(self.settle)
+            if source.file_signature() != signature:
+                continue
+            try:
+                source.reload()
+                reloaded += 1
+                self._failed.pop(id(source), None)
+            except Exception as e:
+                self.stats["errors"] += 1
+                self._failed[id(source)] = signature
+                logger.warning(f"⚠️ Rechargement reporté ({type(source).__name__}): {e}")
+        if reloaded:
+            self.stats["reloads"] += reloaded
+            if self.on_reload:
+                self.on_reload()
+        return reloaded
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Erreur du watcher de données: {e}")
@@ -7,9 +7,12 @@ Version qui fonctionne à coup sûr
 import json
 import numpy as np
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import urllib.parse
 
+from compression import choose_encoding, compress_bytes
+from response_cache import ResponseCache
+
 # Données simulées pour la démonstration
 def generate_sample_data():
     """Générer des données d'exemple pour le dashboard"""
@@ -76,18 +79,16 @@ def generate_sample_data():
 
 # Générer les données
 DATA = generate_sample_data()
+# Horodatage des données : les réponses ne changent qu'avec elles
+DATA_LOADED_AT = datetime.now().isoformat()
+DATA_VERSION = DATA_LOADED_AT
+
+# Corps JSON et variantes compressées (gzip, br) par route, comme l'app Flask
+response_cache = ResponseCache()
 
 class DashboardHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        """Gérer les requêtes GET"""
-        # Ajouter les headers CORS
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        
+    def build_response(self):
+        """Réponse (dict) de la route demandée, None si l'endpoint est inconnu"""
         # Router les requêtes
         if self.path == '/':
             response = {
@@ -104,19 +105,19 @@ class DashboardHandler(BaseHTTPRequestHandler):
             response = {
                 "success": True,
                 "data": DATA['summary_stats'],
-                "timestamp": datetime.now().isoformat()
+                "timestamp": DATA_LOADED_AT
             }
         elif self.path == '/api/protected-areas':
             response = {
                 "success": True,
                 "data": DATA['protected_areas'],
-                "timestamp": datetime.now().isoformat()
+                "timestamp": DATA_LOADED_AT
             }
         elif self.path == '/api/deforestation':
             response = {
                 "success": True,
                 "data": DATA['deforestation_data'],
-                "timestamp": datetime.now().isoformat()
+                "timestamp": DATA_LOADED_AT
             }
         elif self.path == '/api/correlation':
             correlations = []
@@ -137,7 +138,7 @@ class DashboardHandler(BaseHTTPRequestHandler):
                     "avg_correlation": np.mean([c["correlation_coefficient"] for c in correlations]),
                     "total_areas_analyzed": len(correlations)
                 },
-                "timestamp": datetime.now().isoformat()
+                "timestamp": DATA_LOADED_AT
             }
         elif self.path == '/api/trends':
             years = ['2020', '2021', '2022', '2023']
@@ -172,13 +173,46 @@ class DashboardHandler(BaseHTTPRequestHandler):
                     "investment_trends": investment_trends,
                     "deforestation_trends": deforestation_trends
                 },
-                "timestamp": datetime.now().isoformat()
+                "timestamp": DATA_LOADED_AT
             }
         else:
-            response = {"success": False, "error": "Endpoint non trouvé"}
-        
-        # Envoyer la réponse
-        self.wfile.write(json.dumps(response, indent=2).encode())
+            response = None
+        return response
+
+    def do_GET(self):
+        """Gérer les requêtes GET"""
+        # Corps brut en cache par route ; sérialisé seulement au premier appel
+        body = response_cache.get(self.path, DATA_VERSION)
+        if body is None:
+            response = self.build_response()
+            if response is None:
+                response = {"success": False, "error": "Endpoint non trouvé"}
+            # JSON compact
+            body = json.dumps(response, separators=(',', ':')).encode()
+            if response.get("success", True):
+                response_cache.put(self.path, DATA_VERSION, body)
+
+        # Variante compressée négociée : calculée une fois puis gardée à côté du corps
+        encoding = choose_encoding(body, self.headers.get('Accept-Encoding'))
+        if encoding:
+            compressed = response_cache.get(self.path, DATA_VERSION, encoding)
+            if compressed is None:
+                compressed = compress_bytes(body, encoding)
+                response_cache.put(self.path, DATA_VERSION, compressed, encoding)
+            body = compressed
+
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        # Ajouter les headers CORS
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+        self.wfile.write(body)
     
     def do_OPTIONS(self):
         """Gérer les requêtes OPTIONS pour CORS"""
@@ -191,7 +225,9 @@ class DashboardHandler(BaseHTTPRequestHandler):
 def run_server():
     """Démarrer le serveur"""
     server_address = ('', 5000)
-    httpd = HTTPServer(server_address, DashboardHandler)
+    # Un thread par requête : une réponse lente ne bloque plus les autres clients
+    httpd = ThreadingHTTPServer(server_address, DashboardHandler)
+    httpd.daemon_threads = True
     
     print("🌍 Dashboard Environnemental Madagascar")
     print("=" * 50)
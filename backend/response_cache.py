@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Cache des réponses JSON déjà sérialisées
+Les corps sont stockés en bytes, par endpoint et query string normalisée,
+et vidés uniquement lorsque la version des données change.
+Gère aussi les requêtes conditionnelles (ETag / Last-Modified -> 304)
+et la compression négociée, dont les variantes sont gardées en cache.
+"""
+
+import hashlib
+import threading
+from functools import wraps
+from urllib.parse import urlencode
+
+try:
+    from flask import request, current_app, g
+except ImportError:
+    # Sans Flask, ResponseCache reste utilisable seul (backend/http_server.py)
+    request = current_app = g = None
+
+from compression import choose_encoding, compress_bytes, supported_encodings
+
+
+class ResponseCache:
+    """Corps JSON encodés, indexés par (endpoint, query string normalisée)
+
+    Chaque entrée garde le corps brut ("identity") et ses variantes
+    compressées ("gzip", "br") au fur et à mesure qu'elles sont demandées.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._version = None
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def make_key(endpoint, args):
+        """Clé stable : paramètres triés, l'ordre dans l'URL n'a pas d'effet"""
+        items = sorted((k, v) for k in args for v in args.getlist(k))
+        return f"{endpoint}?{urlencode(items)}"
+
+    def _check_version(self, version):
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    if self._version is not None:
+                        self.stats["invalidations"] += 1
+                    self._entries = {}
+                    self._version = version
+
+    def get(self, key, version, encoding="identity"):
+        self._check_version(version)
+        variants = self._entries.get(key)
+        body = variants.get(encoding) if variants else None
+        if body is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["hits"] += 1
+        return body
+
+    def put(self, key, version, body, encoding="identity"):
+        self._check_version(version)
+        with self._lock:
+            if version != self._version:
+                return
+            variants = self._entries.get(key)
+            if variants is None:
+                if encoding != "identity":
+                    return
+                if len(self._entries) >= self.max_entries:
+                    # Éviction simple : l'entrée la plus ancienne
+                    self._entries.pop(next(iter(self._entries)))
+                variants = self._entries[key] = {}
+            variants[encoding] = body
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = {}
+            self._version = None
+            self.stats["invalidations"] += 1
+
+    def get_stats(self):
+        entries = list(self._entries.values())
+        return {
+            **self.stats,
+            "entries": len(entries),
+            "compressed_variants": sum(len(v) - 1 for v in entries),
+            "bytes": sum(len(b) for v in entries for b in v.values()),
+            "version": self._version,
+        }
+
+
+def cached_json(cache, version_getter):
+    """Décorateur : sert le corps en cache, sinon exécute la vue et stocke ses bytes.
+
+    Seules les réponses 200 sont mises en cache ; les erreurs passent telles quelles.
+    La variante compressée négociée est servie depuis le cache, ou calculée
+    une fois puis stockée à côté du corps brut.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = version_getter()
+            key = cache.make_key(request.endpoint, request.args)
+            body = cache.get(key, version)
+            if body is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.mimetype != "application/json":
+                    return response
+                body = response.get_data()
+                cache.put(key, version, body)
+
+            encoding = choose_encoding(body, request.headers.get("Accept-Encoding"),
+                                       current_app.config.get("COMPRESS_MIN_SIZE"))
+            if encoding is None:
+                response = current_app.response_class(body, mimetype="application/json")
+            else:
+                compressed = cache.get(key, version, encoding)
+                if compressed is None:
+                    compressed = compress_bytes(body, encoding)
+                    cache.put(key, version, compressed, encoding)
+                response = current_app.response_class(compressed, mimetype="application/json")
+                response.headers["Content-Encoding"] = encoding
+            response.vary.add("Accept-Encoding")
+            return response
+        return wrapper
+    return decorator
+
+
+def install_compression(app):
+    """Compresser à la volée les réponses JSON non mises en cache.
+
+    À installer après install_conditional_get : les hooks after_request
+    s'exécutent en ordre inverse, l'ETag voit donc l'encodage final.
+    """
+    @app.after_request
+    def _compress(response):
+        if (response.status_code != 200 or response.direct_passthrough
+                or response.mimetype != "application/json"
+                or "Content-Encoding" in response.headers):
+            return response
+        body = response.get_data()
+        encoding = choose_encoding(body, request.headers.get("Accept-Encoding"),
+                                   app.config.get("COMPRESS_MIN_SIZE"))
+        response.vary.add("Accept-Encoding")
+        if encoding is not None:
+            response.set_data(compress_bytes(body, encoding))
+            response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def install_conditional_get(app, version_getter, last_modified_getter, exclude=()):
+    """Ajouter ETag / Last-Modified aux routes GET et répondre 304 avant la vue.
+
+    L'ETag fort est dérivé de la version des données et de la requête
+    (endpoint + query string normalisée) : il change seulement si les
+    données changent, sans avoir à sérialiser le corps pour le calculer.
+    """
+    excluded = set(exclude)
+
+    @app.before_request
+    def _conditional_get():
+        if request.method not in ("GET", "HEAD"):
+            return None
+        if request.endpoint is None or request.endpoint in excluded:
+            return None
+
+        key = ResponseCache.make_key(request.endpoint, request.args)
+        etag = hashlib.sha1(f"{version_getter()}|{key}".encode("utf-8")).hexdigest()[:20]
+        last_modified = last_modified_getter()
+        g.conditional = (etag, last_modified)
+
+        if request.if_none_match:
+            # Les variantes compressées portent l'ETag suffixé par leur encodage
+            matched = [tag for tag in _etag_variants(etag) if request.if_none_match.contains_weak(tag)]
+            not_modified = bool(matched)
+            if matched:
+                etag = matched[0]
+        elif request.if_modified_since and last_modified:
+            not_modified = last_modified <= request.if_modified_since
+        else:
+            not_modified = False
+
+        if not_modified:
+            response = app.response_class(status=304)
+            _set_validators(response, etag, last_modified)
+            return response
+        return None
+
+    @app.after_request
+    def _add_validators(response):
+        conditional = g.pop("conditional", None)
+        if conditional and response.status_code == 200:
+            etag, last_modified = conditional
+            encoding = response.headers.get("Content-Encoding")
+            if encoding:
+                etag = f"{etag}-{encoding}"
+            _set_validators(response, etag, last_modified)
+        return response
+
+
+def _etag_variants(etag):
+    return [etag] + [f"{etag}-{encoding}" for encoding in supported_encodings()]
+
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Le navigateur garde la réponse mais revalide à chaque chargement
+    response.cache_control.no_cache = True
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Serveur de production du dashboard : pool de workers pré-forkés
+Les données (dashboard_data.json, unified_yearly.csv + index) sont chargées
+une seule fois dans le processus parent avant le fork : les workers
+partagent ces pages mémoire en copy-on-write.
+
+Usage:
+    python serve.py --workers 4 --threads 8 --port 5001
+
+Signaux (processus parent):
+    SIGHUP          relire les données puis remplacer les workers sans coupure
+    SIGTERM/SIGINT  arrêt gracieux (les requêtes en cours se terminent)
+
+Chaque worker surveille aussi les fichiers de données et les recharge à chaud
+(DASHBOARD_RELOAD_INTERVAL secondes, 0 pour désactiver).
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from werkzeug.serving import BaseWSGIServer
+
+# app.py lit ses données en chemins relatifs au dossier backend
+BACKEND_DIR = Path(__file__).resolve().parent
+os.chdir(BACKEND_DIR)
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Serveur WSGI dont les requêtes sont traitées par un pool de threads borné"""
+
+    def __init__(self, host, port, app, threads, fd=None):
+        super().__init__(host, port, app, fd=fd)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="worker")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def preload():
+    """Charger l'application et ses données dans le parent"""
+    import app as dashboard
+    index = dashboard.yearly_cache.get_index()
+    print(f"📊 Données préchargées : {len(dashboard.api.data['protected_areas']['data'])} AP, "
+          f"{len(index.df)} lignes annuelles")
+    # Objets déjà chargés exclus du GC : leurs pages ne sont plus réécrites après le fork
+    gc.freeze()
+    return dashboard
+
+
+class PreforkServer:
+    """Processus parent : socket d'écoute partagée, workers relancés s'ils meurent"""
+
+    def __init__(self, host, port, workers, threads):
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.threads = threads
+        self.workers = set()
+        self.dashboard = None
+        self.sock = None
+        self._reload = False
+        self._stopping = False
+
+    def spawn_worker(self):
+        pid = os.fork()
+        if pid:
+            self.workers.add(pid)
+            return pid
+
+        # --- Processus worker ---
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+        # Ctrl+C est géré par le parent, qui arrête les workers proprement
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        server = PooledWSGIServer(self.host, self.port, self.dashboard.app,
+                                  self.threads, fd=self.sock.fileno())
+        # Les threads ne survivent pas au fork : watcher démarré dans le worker
+        self.dashboard.start_data_watcher()
+
+        def graceful_stop(signum, frame):
+            # shutdown() attend la fin de serve_forever : à lancer hors du thread principal
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, graceful_stop)
+        try:
+            server.serve_forever()
+        finally:
+            server.pool.shutdown(wait=True)
+            os._exit(0)
+
+    def stop_workers(self, pids, timeout=30):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + timeout
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    remaining.discard(pid)
+                    self.workers.discard(pid)
+            time.sleep(0.1)
+        for pid in remaining:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.workers.discard(pid)
+
+    def reload(self):
+        """Relire les données dans le parent, puis remplacer les workers
+
+        Lecture stricte (api.reload / yearly_cache.reload lèvent une exception
+        sur un fichier illisible) : jamais de repli sur les données par défaut
+        de load_dashboard_data, réservé au démarrage.
+        """
+        print("🔄 SIGHUP : rechargement des données et des workers...")
+        gc.unfreeze()
+        try:
+            self.dashboard.api.reload()
+            self.dashboard.yearly_cache.reload()
+        except Exception as e:
+            # Fichier en cours d'écriture ou invalide : données et workers actuels conservés
+            print(f"❌ Rechargement annulé ({type(e).__name__}: {e}), workers actuels conservés")
+            return False
+        finally:
+            gc.freeze()
+        old = set(self.workers)
+        for _ in range(self.num_workers):
+            self.spawn_worker()
+        self.stop_workers(old)
+        print(f"✅ {self.num_workers} nouveaux workers actifs")
+        return True
+
+    def run(self):
+        self.dashboard = preload()
+        self.sock = socket.create_server((self.host, self.port), backlog=2048)
+        self.sock.set_inheritable(True)
+
+        signal.signal(signal.SIGHUP, lambda s, f: setattr(self, '_reload', True))
+        signal.signal(signal.SIGTERM, lambda s, f: setattr(self, '_stopping', True))
+        signal.signal(signal.SIGINT, lambda s, f: setattr(self, '_stopping', True))
+
+        for _ in range(self.num_workers):
+            self.spawn_worker()
+        print(f"🚀 http://{self.host}:{self.port} - {self.num_workers} workers x {self.threads} threads "
+              f"(parent PID {os.getpid()})")
+
+        while not self._stopping:
+            if self._reload:
+                self._reload = False
+                self.reload()
+            # Relancer les workers morts de façon inattendue
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid and pid in self.workers:
+                self.workers.discard(pid)
+                if not self._stopping:
+                    print(f"⚠️ Worker {pid} arrêté, relance")
+                    self.spawn_worker()
+            time.sleep(0.2)
+
+        print("\n🛑 Arrêt des workers...")
+        self.stop_workers(set(self.workers))
+        self.sock.close()
+
+
+def run_single_process(host, port, threads):
+    """Repli sans fork (Windows) : un processus, pool de threads"""
+    dashboard = preload()
+    server = PooledWSGIServer(host, port, dashboard.app, threads)
+    dashboard.start_data_watcher()
+    print(f"🚀 http://{host}:{port} - 1 processus x {threads} threads")
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de production du dashboard")
+    parser.add_argument("--host", default=os.environ.get("DASHBOARD_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("DASHBOARD_PORT", 5001)))
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("DASHBOARD_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("DASHBOARD_THREADS", 8)))
+    args = parser.parse_args()
+
+    print("🌍 Dashboard Environnemental Madagascar - mode production")
+    if hasattr(os, "fork") and args.workers > 1:
+        PreforkServer(args.host, args.port, args.workers, args.threads).run()
+    else:
+        run_single_process(args.host, args.port, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Cache mémoire du tableau annuel unifié (unified_yearly.csv)
+Le tableau est lu une seule fois en colonnes typées (depuis le snapshot
+binaire s'il existe, sinon le CSV), puis relu uniquement lorsque sa
+date de modification ou sa taille change.
+"""
+
+import threading
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_snapshot import open_snapshot, source_signature
+
+logger = logging.getLogger(__name__)
+
+# Métriques pivotées en matrices (AP x année) à chaque chargement
+PIVOT_COLUMNS = ("Financement_annuel_USD", "FCL_pct_surface", "FIRE_par_100ha_moy", "Superficie_ha")
+
+def _typed_dtypes(columns):
+    """Types cibles : AP catégorielle, année int16, métriques float64
+
+    Les métriques restent en float64 : elles sont servies telles quelles par
+    /api/yearly, et float32 y ferait apparaître des chiffres parasites.
+    """
+    dtypes = {}
+    for col in columns:
+        if col == "AP_Name":
+            dtypes[col] = "category"
+        elif col == "Année":
+            continue  # converti après lecture (valeurs manquantes possibles)
+        else:
+            dtypes[col] = np.float64
+    return dtypes
+
+
+def type_yearly_frame(df):
+    """Appliquer les types du cache à un tableau annuel déjà en mémoire"""
+    df = df.astype({col: dtype for col, dtype in _typed_dtypes(df.columns).items()
+                    if df[col].dtype != dtype})
+    if "Année" in df.columns:
+        if df["Année"].isna().any():
+            df = df[df["Année"].notna()]
+        if df["Année"].dtype != np.int16:
+            df = df.assign(Année=df["Année"].astype(np.int16))
+    if "AP_Name" in df.columns:
+        df = df.assign(AP_Name=df["AP_Name"].cat.remove_unused_categories())
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0:
+        df = df.reset_index(drop=True)
+    return df
+
+
+def normalize_ap_name(name):
+    """Clé de recherche d'une AP (insensible à la casse et aux espaces)"""
+    return str(name).strip().upper()
+
+
+class YearlyIndex:
+    """Index construit à chaque chargement : AP -> tranche de lignes, années triées
+
+    Les lignes sont triées par (AP normalisée, année) : une requête
+    ap + intervalle d'années devient une recherche dans un dict suivie
+    de deux recherches dichotomiques. Les métriques de PIVOT_COLUMNS sont
+    aussi pivotées en matrices (AP x année) pour les agrégats annuels.
+    """
+
+    def __init__(self, df):
+        self.pivot_years = np.array([], dtype=np.int16)
+        self.pivots = {}
+        if df.empty or "AP_Name" not in df.columns or "Année" not in df.columns:
+            self.df = df
+            self.ap_slices = {}
+            self.years = np.array([], dtype=np.int16)
+            self.year_order = np.array([], dtype=np.intp)
+            self.years_sorted = self.years
+            return
+
+        names = df["AP_Name"].astype(str).str.strip().str.upper().to_numpy()
+        keys, codes = np.unique(names, return_inverse=True)
+        order = np.lexsort((df["Année"].to_numpy(), codes))
+        self.df = df.iloc[order].reset_index(drop=True)
+        codes = codes[order]
+
+        key_ids = np.arange(len(keys))
+        starts = np.searchsorted(codes, key_ids, side="left")
+        stops = np.searchsorted(codes, key_ids, side="right")
+        self.ap_slices = {
+            key: (int(a), int(b)) for key, a, b in zip(keys.tolist(), starts, stops)
+        }
+
+        self.years = self.df["Année"].to_numpy()
+        self.year_order = np.argsort(self.years, kind="stable")
+        self.years_sorted = self.years[self.year_order]
+        self._build_pivots(codes, len(keys))
+
+    def _build_pivots(self, codes, n_aps):
+        """Matrices (AP x année) ; plusieurs lignes pour une même case -> moyenne"""
+        self.pivot_years = np.unique(self.years)
+        year_idx = np.searchsorted(self.pivot_years, self.years)
+        shape = (n_aps, len(self.pivot_years))
+        for col in PIVOT_COLUMNS:
+            if col not in self.df.columns:
+                continue
+            values = self.df[col].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(values)
+            sums = np.zeros(shape)
+            counts = np.zeros(shape)
+            np.add.at(sums, (codes[valid], year_idx[valid]), values[valid])
+            np.add.at(counts, (codes[valid], year_idx[valid]), 1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self.pivots[col] = np.where(counts > 0, sums / counts, np.nan)
+
+    def locate(self, ap=None, start=None, end=None):
+        """Positions des lignes filtrées (tranche ou tableau), triées par année
+
+        Ne matérialise aucune ligne : len() donne le total à paginer.
+        """
+        if ap:
+            bounds = self.ap_slices.get(normalize_ap_name(ap))
+            if bounds is None:
+                return slice(0, 0)
+            a, b = bounds
+            years = self.years[a:b]
+            lo = a + (np.searchsorted(years, start, side="left") if start else 0)
+            hi = a + (np.searchsorted(years, end, side="right") if end else len(years))
+            return slice(int(lo), int(max(lo, hi)))
+
+        lo = np.searchsorted(self.years_sorted, start, side="left") if start else 0
+        hi = np.searchsorted(self.years_sorted, end, side="right") if end else len(self.years_sorted)
+        return self.year_order[lo:max(lo, hi)]
+
+    @staticmethod
+    def count(positions):
+        if isinstance(positions, slice):
+            return positions.stop - positions.start
+        return len(positions)
+
+    def query(self, ap=None, start=None, end=None):
+        """Lignes filtrées par AP et intervalle d'années, triées par année"""
+        return self.df.iloc[self.locate(ap, start, end)]
+
+
+class YearlyCache:
+    """Cache process du tableau annuel, rechargé si le fichier change
+
+    Avec snapshot_root, la table "yearly" du snapshot binaire fait foi ;
+    le CSV n'est lu qu'en l'absence de snapshot.
+    """
+
+    def __init__(self, path, snapshot_root=None):
+        self.path = Path(path)
+        self.snapshot_root = snapshot_root
+        self._lock = threading.Lock()
+        # (signature, index) remplacé d'un bloc pour éviter les lectures mixtes
+        self._snapshot = None
+        # False quand un DataWatcher recharge le fichier en arrière-plan
+        self.auto_reload = True
+        self.stats = {"hits": 0, "misses": 0, "reloads": 0}
+
+    def file_signature(self):
+        """(mtime_ns, taille) du fichier, None s'il est absent"""
+        if self.snapshot_root is not None:
+            return source_signature(self.path, self.snapshot_root)
+        try:
+            st = self.path.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read(self):
+        if self.snapshot_root is not None:
+            snapshot = open_snapshot(self.snapshot_root)
+            if snapshot is not None and snapshot.has("yearly"):
+                # Colonnes déjà typées à l'écriture : ouverture sans conversion
+                return type_yearly_frame(snapshot.table("yearly"))
+        header = pd.read_csv(self.path, nrows=0).columns
+        return type_yearly_frame(pd.read_csv(self.path, dtype=_typed_dtypes(header)))
+
+    def get_index(self, count=True):
+        """Retourner l'index courant (rechargé si le fichier a changé et auto_reload)
+
+        count=False : accès interne, non comptabilisé dans les statistiques.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and not self.auto_reload:
+            if count:
+                self.stats["hits"] += 1
+            return snapshot[1]
+
+        signature = self.file_signature()
+        if signature is None:
+            return snapshot[1] if snapshot is not None else YearlyIndex(pd.DataFrame())
+        if snapshot is not None and snapshot[0] == signature:
+            if count:
+                self.stats["hits"] += 1
+            return snapshot[1]
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot[0] == signature:
+                if count:
+                    self.stats["hits"] += 1
+                return snapshot[1]
+            self.stats["misses"] += 1
+            try:
+                index = YearlyIndex(self._read())
+            except Exception as e:
+                logger.error(f"Erreur lecture {self.path.name}: {e}")
+                return snapshot[1] if snapshot is not None else YearlyIndex(pd.DataFrame())
+            if snapshot is not None:
+                self.stats["reloads"] += 1
+                logger.info(f"🔄 {self.path.name} rechargé ({len(index.df)} lignes)")
+            self._snapshot = (signature, index)
+            return index
+
+    def reload(self):
+        """Relire le fichier et échanger l'index d'un bloc (appelé hors des requêtes)
+
+        Lève une exception si le fichier change pendant la lecture : l'index
+        précédent reste alors en service.
+        """
+        signature = self.file_signature()
+        if signature is None:
+            return None
+        with self._lock:
+            index = YearlyIndex(self._read())
+            if signature != self.file_signature():
+                raise IOError(f"{self.path.name} modifié pendant la lecture")
+            if self._snapshot is not None:
+                self.stats["reloads"] += 1
+            self._snapshot = (signature, index)
+        logger.info(f"🔄 {self.path.name} rechargé ({len(index.df)} lignes)")
+        return index
+
+    def loaded_signature(self):
+        """Signature du fichier tel qu'il a été chargé (None si rien n'est chargé)"""
+        snapshot = self._snapshot
+        return snapshot[0] if snapshot is not None else None
+
+    def current_signature(self):
+        """Signature des données servies, après rechargement éventuel"""
+        self.get_index(count=False)
+        return self.loaded_signature()
+
+    def get(self):
+        """Retourner le DataFrame en cache (ne pas le modifier en place)"""
+        return self.get_index().df
+
+    def query(self, ap=None, start=None, end=None):
+        """Filtrer par AP (clé normalisée) et années via l'index"""
+        return self.get_index().query(ap, start, end)
+
+    def get_stats(self):
+        """Compteurs hit/miss/reload et état du cache"""
+        snapshot = self._snapshot
+        df = snapshot[1].df if snapshot is not None else None
+        return {
+            **self.stats,
+            "loaded": df is not None,
+            "rows": 0 if df is None else len(df),
+            "indexed_aps": 0 if snapshot is None else len(snapshot[1].ap_slices),
+            "memory_bytes": 0 if df is None else int(df.memory_usage(deep=True).sum()),
+            "signature": list(snapshot[0]) if snapshot is not None else None,
+        }
@@ -6,11 +6,18 @@ Utilise exactement les fichiers et feuilles spécifiés par l'utilisateur
 
 import pandas as pd
 import numpy as np
-import json
 from pathlib import Path
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# Lecture des classeurs avec cache binaire (excel_cache.py)
+from excel_cache import read_excel
+
+# Snapshot binaire partagé avec l'API (backend/data_snapshot.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+from data_snapshot import save_outputs
+
 class CorrectDataProcessor:
     def __init__(self, data_path="."):
         self.data_path = Path(data_path)
@@ -24,7 +31,7 @@ class CorrectDataProcessor:
         
         # 1. Fonds 2007-25.xlsx Feuil2 (2) - DONNÉES PRINCIPALES
         try:
-            self.fonds_data = pd.read_excel(self.data_path / "Fonds 2007-25.xlsx", sheet_name="Feuil2 (2)")
+            self.fonds_data = read_excel(self.data_path / "Fonds 2007-25.xlsx", sheet_name="Feuil2 (2)")
             # Convertir les types numériques immédiatement
             self.fonds_data['Financement'] = pd.to_numeric(self.fonds_data['Financement'], errors='coerce')
             self.fonds_data['Année'] = pd.to_numeric(self.fonds_data['Année'], errors='coerce')
@@ -38,7 +45,7 @@ class CorrectDataProcessor:
             
         # 2. AP_Synthese_clean.xlsx - Superficie_ha, FIRE_total, FIRE_par_100ha_moy
         try:
-            self.ap_synthese = pd.read_excel(self.data_path / "AP_Synthese_clean.xlsx", sheet_name=0)
+            self.ap_synthese = read_excel(self.data_path / "AP_Synthese_clean.xlsx", sheet_name=0)
             print(f"✅ AP_Synthese_clean.xlsx chargé: {len(self.ap_synthese)} lignes")
             print(f"   Colonnes: {list(self.ap_synthese.columns)}")
         except Exception as e:
@@ -120,8 +127,7 @@ class CorrectDataProcessor:
         
         # Sauvegarder
         output_path = Path("backend/data")
-        output_path.mkdir(exist_ok=True)
-        yearly_df.to_csv(output_path / "unified_yearly.csv", index=False)
+        save_outputs(output_path, yearly_df=yearly_df)
         
         print(f"✅ unified_yearly.csv écrit ({len(yearly_df)} lignes)")
         print(f"   Années: {sorted(yearly_df['Année'].unique())}")
@@ -177,10 +183,7 @@ class CorrectDataProcessor:
         
         # Sauvegarder les données
         output_path = Path("backend/data")
-        output_path.mkdir(exist_ok=True)
-        
-        with open(output_path / "dashboard_data.json", "w", encoding="utf-8") as f:
-            json.dump(dashboard_data, f, indent=2, default=str)
+        save_outputs(output_path, dashboard=dashboard_data)
         
         print("✅ Données réelles générées avec succès!")
         print(f"📊 Aires protégées: {total_areas}")
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Corrélations par groupe (AP) en une seule passe
+Les observations sont triées une fois par groupe ; moyennes, variances et
+covariances sont des réductions par segment (np.add.reduceat) sur des
+tableaux contigus. Pearson et Spearman (rangs moyens par groupe) et leurs
+p-values bilatérales sont calculés pour tous les groupes à la fois, avec
+les mêmes lois que scipy.stats.pearsonr / spearmanr.
+
+bootstrap_correlations() ajoute des intervalles de confiance bootstrap et
+une p-value de permutation : les B rééchantillonnages d'un groupe forment
+une matrice d'indices (B x n) et les B corrélations sont calculées en une
+passe ; les blocs peuvent être répartis dans un pool de processus.
+
+Usage:
+    from correlation_engine import grouped_correlations, bootstrap_correlations
+    corr = grouped_correlations(df["AP_Name"], df["Financement_annuel_USD"],
+                                df["FIRE_par_100ha_moy"], min_obs=3)
+    ci = bootstrap_correlations(df["AP_Name"], df["Financement_annuel_USD"],
+                                df["FIRE_par_100ha_moy"], n_boot=10000, seed=42)
+"""
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Éléments (groupes x tirages x observations) par bloc de rééchantillonnage
+CHUNK_ELEMENTS = 2_000_000
+
+
+def _segment_pearson(x, y, starts, n):
+    """Coefficient de Pearson de chaque segment contigu [starts[i], starts[i] + n[i])"""
+    mean_x = np.add.reduceat(x, starts) / n
+    mean_y = np.add.reduceat(y, starts) / n
+    dx = x - np.repeat(mean_x, n)
+    dy = y - np.repeat(mean_y, n)
+    sxx = np.add.reduceat(dx * dx, starts)
+    syy = np.add.reduceat(dy * dy, starts)
+    sxy = np.add.reduceat(dx * dy, starts)
+    # Segment constant -> NaN, comme scipy (test exact, sans résidu d'arrondi)
+    constant = ((np.minimum.reduceat(x, starts) == np.maximum.reduceat(x, starts))
+                | (np.minimum.reduceat(y, starts) == np.maximum.reduceat(y, starts)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.where(constant, np.nan, sxy / np.sqrt(sxx * syy))
+    return np.clip(r, -1.0, 1.0), mean_x, mean_y
+
+
+def pearson_pvalue(r, n):
+    """p-value bilatérale de Pearson (loi bêta exacte de r sous H0, comme scipy)"""
+    a = np.asarray(n, dtype=float) / 2 - 1
+    with np.errstate(invalid="ignore"):
+        return np.clip(2 * stats.beta.cdf(-np.abs(r), a, a, loc=-1, scale=2), 0.0, 1.0)
+
+
+def spearman_pvalue(rho, n):
+    """p-value bilatérale de Spearman (approximation t à n-2 degrés de liberté, comme scipy)"""
+    dof = np.asarray(n, dtype=float) - 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = rho * np.sqrt(dof / ((rho + 1.0) * (1.0 - rho)))
+    return 2 * stats.t.sf(np.abs(t), dof)
+
+
+def _segments(groups, x, y, min_obs):
+    """Observations triées par groupe : (groupes retenus, x, y, codes, débuts, tailles)
+
+    groups=None : un seul groupe. Les groupes sont dans l'ordre de première apparition.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if groups is None:
+        codes, uniques = np.zeros(len(x), dtype=np.intp), np.array([None], dtype=object)
+    else:
+        codes, uniques = pd.factorize(np.asarray(groups, dtype=object))
+
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    kept = counts >= max(min_obs, 2)
+    rows = (codes >= 0) & kept[np.maximum(codes, 0)]
+    # Tri unique par groupe (stable : l'ordre des années est conservé)
+    order = np.flatnonzero(rows)[np.argsort(codes[rows], kind="stable")]
+    n = counts[kept]
+    starts = np.concatenate([[0], np.cumsum(n)[:-1]]).astype(np.intp)
+    return uniques[kept], x[order], y[order], codes[order], starts, n
+
+
+def grouped_correlations(groups, x, y, min_obs=3):
+    """Pearson et Spearman de x contre y dans chaque groupe d'au moins min_obs observations
+
+    Renvoie un DataFrame (groupes dans l'ordre de première apparition) :
+    group, n_obs, pearson, p_pearson, spearman, p_spearman, mean_x, mean_y.
+    """
+    names, x, y, seg_codes, starts, n = _segments(groups, x, y, min_obs)
+    columns = ["group", "n_obs", "pearson", "p_pearson", "spearman", "p_spearman", "mean_x", "mean_y"]
+    if len(n) == 0:
+        return pd.DataFrame(columns=columns)
+
+    pearson, mean_x, mean_y = _segment_pearson(x, y, starts, n)
+    rank_x = pd.Series(x).groupby(seg_codes).rank(method="average").to_numpy()
+    rank_y = pd.Series(y).groupby(seg_codes).rank(method="average").to_numpy()
+    spearman, _, _ = _segment_pearson(rank_x, rank_y, starts, n)
+
+    return pd.DataFrame({
+        "group": names,
+        "n_obs": n,
+        "pearson": pearson,
+        "p_pearson": pearson_pvalue(pearson, n),
+        "spearman": spearman,
+        "p_spearman": spearman_pvalue(spearman, n),
+        "mean_x": mean_x,
+        "mean_y": mean_y,
+    }, columns=columns)
+
+
+# ---------- Bootstrap et permutations ----------
+def _rows_corr(x, y, method):
+    """Corrélation le long du dernier axe ; ligne constante -> NaN"""
+    if method == "spearman":
+        x = stats.rankdata(x, axis=-1)
+        y = stats.rankdata(y, axis=-1)
+    dx = x - x.mean(axis=-1, keepdims=True)
+    dy = y - y.mean(axis=-1, keepdims=True)
+    constant = (x.min(axis=-1) == x.max(axis=-1)) | (y.min(axis=-1) == y.max(axis=-1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = (dx * dy).sum(axis=-1) / np.sqrt((dx * dx).sum(axis=-1) * (dy * dy).sum(axis=-1))
+    return np.clip(np.where(constant, np.nan, r), -1.0, 1.0)
+
+
+def _bootstrap_block(xb, yb, n_draws, seed, method):
+    """n_draws rééchantillonnages de G groupes de même taille n (xb, yb : G x n)
+
+    Renvoie (corrélations bootstrap G x n_draws, dépassements de permutation G,
+    corrélations observées G).
+    """
+    rng = np.random.default_rng(seed)
+    g, n = xb.shape
+    rows = np.arange(g)[:, None, None]
+    idx = rng.integers(0, n, size=(g, n_draws, n))
+    boot = _rows_corr(xb[rows, idx], yb[rows, idx], method)
+
+    observed = _rows_corr(xb, yb, method)
+    shuffled = rng.permuted(np.repeat(yb[:, None, :], n_draws, axis=1), axis=-1)
+    perm = _rows_corr(np.broadcast_to(xb[:, None, :], shuffled.shape), shuffled, method)
+    # Tolérance relative : une permutation identique compte comme « au moins aussi extrême »
+    exceed = (np.abs(perm) >= np.abs(observed)[:, None] * (1 - 1e-12)).sum(axis=-1)
+    return boot, exceed, observed
+
+
+def _run_blocks(tasks, workers):
+    workers = min(len(tasks), workers or 1, os.cpu_count() or 1)
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(_bootstrap_block, *zip(*tasks)))
+        except (OSError, NotImplementedError) as e:
+            print(f"⚠️ Pool de processus indisponible ({e}), bootstrap séquentiel")
+    return [_bootstrap_block(*task) for task in tasks]
+
+
+def bootstrap_correlations(groups, x, y, n_boot=1000, seed=None, method="pearson",
+                           confidence=0.95, min_obs=3, workers=1):
+    """Intervalle de confiance bootstrap (percentile) et p-value de permutation par groupe
+
+    groups=None : corrélation globale (un seul groupe). Les groupes de même
+    taille sont traités ensemble, par blocs d'au plus CHUNK_ELEMENTS valeurs ;
+    chaque bloc a sa graine dérivée de seed : les résultats ne dépendent ni du
+    découpage en processus ni de workers.
+
+    Renvoie un DataFrame : group, n_obs, estimate, ci_low, ci_high, se, p_permutation.
+    """
+    names, x, y, _, starts, n = _segments(groups, x, y, min_obs)
+    columns = ["group", "n_obs", "estimate", "ci_low", "ci_high", "se", "p_permutation"]
+    if len(n) == 0:
+        return pd.DataFrame(columns=columns)
+
+    # Blocs : (groupes, tirages) ; une graine par bloc
+    blocks = []
+    for size in np.unique(n):
+        ids = np.flatnonzero(n == size)
+        per_group = int(size) * n_boot
+        group_step = max(1, CHUNK_ELEMENTS // per_group)
+        draw_step = n_boot if group_step > 1 or per_group <= CHUNK_ELEMENTS else max(1, CHUNK_ELEMENTS // int(size))
+        for g0 in range(0, len(ids), group_step):
+            chunk = ids[g0:g0 + group_step]
+            take = starts[chunk][:, None] + np.arange(size)
+            for b0 in range(0, n_boot, draw_step):
+                blocks.append((chunk, x[take], y[take], min(draw_step, n_boot - b0)))
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+    tasks = [(xb, yb, draws, s, method) for (_, xb, yb, draws), s in zip(blocks, seeds)]
+    results = _run_blocks(tasks, workers)
+
+    boot = {}
+    exceed = np.zeros(len(n))
+    estimate = np.full(len(n), np.nan)
+    for (chunk, _, _, _), (block_boot, block_exceed, observed) in zip(blocks, results):
+        for i, gid in enumerate(chunk):
+            boot.setdefault(gid, []).append(block_boot[i])
+        exceed[chunk] += block_exceed
+        estimate[chunk] = observed
+
+    alpha = 1 - confidence
+    stacked = np.vstack([np.concatenate(boot[gid]) for gid in range(len(n))])
+    with warnings.catch_warnings():
+        # Groupe dont tous les tirages sont constants : IC NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        low, high = np.nanpercentile(stacked, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=1)
+        se = np.nanstd(stacked, axis=1, ddof=1)
+
+    p_perm = np.where(np.isnan(estimate), np.nan, (1 + exceed) / (1 + n_boot))
+    return pd.DataFrame({
+        "group": names,
+        "n_obs": n,
+        "estimate": estimate,
+        "ci_low": low,
+        "ci_high": high,
+        "se": se,
+        "p_permutation": p_perm,
+    }, columns=columns)
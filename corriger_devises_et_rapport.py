@@ -16,6 +16,8 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from excel_cache import read_excel
+
 class CorrecteurDevises:
     """Corrige les devises et la cohérence des rapports"""
     
@@ -51,7 +53,7 @@ class CorrecteurDevises:
         print("📂 Chargement des données brutes...")
         
         # Charger les données annuelles (en MGA)
-        df_annuel = pd.read_excel(self.data_path / "AP_Annuel_clean.xlsx")
+        df_annuel = read_excel(self.data_path / "AP_Annuel_clean.xlsx")
         print(f"✅ Données annuelles: {len(df_annuel)} lignes")
         print(f"   Période: {df_annuel['Annee'].min()}-{df_annuel['Annee'].max()}")
         print(f"   Financement max: {df_annuel['Financement'].max():,.0f} MGA")
@@ -64,17 +66,12 @@ class CorrecteurDevises:
         
         df_converted = df.copy()
         
-        # Convertir le financement total
-        df_converted['Financement_USD'] = df_converted.apply(
-            lambda row: row['Financement'] / self.taux_change_mga_usd.get(row['Annee'], self.taux_change_mga_usd['moyen']),
-            axis=1
-        )
+        # Taux de l'année (taux moyen si l'année est inconnue), une fois par ligne
+        taux = df_converted['Annee'].map(self.taux_change_mga_usd).fillna(self.taux_change_mga_usd['moyen'])
         
-        # Convertir le financement par hectare
-        df_converted['Financement_par_ha_USD'] = df_converted.apply(
-            lambda row: row['Financement_par_ha'] / self.taux_change_mga_usd.get(row['Annee'], self.taux_change_mga_usd['moyen']),
-            axis=1
-        )
+        # Convertir le financement total et par hectare
+        df_converted['Financement_USD'] = df_converted['Financement'] / taux
+        df_converted['Financement_par_ha_USD'] = df_converted['Financement_par_ha'] / taux
         
         print(f"✅ Conversion terminée")
         print(f"   Exemple: {df['Financement'].max():,.0f} MGA → {df_converted['Financement_USD'].max():,.0f} USD")
@@ -6,13 +6,17 @@ Analyser les données d'aires protégées et de déforestation
 
 import pandas as pd
 import numpy as np
-import json
 from pathlib import Path
+import sys
 import matplotlib.pyplot as plt
 import seaborn as sns
 import warnings
 warnings.filterwarnings('ignore')
 
+# Snapshot binaire partagé avec l'API (backend/data_snapshot.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from data_snapshot import save_outputs
+
 # Import conditionnel de geopandas
 try:
     import geopandas as gpd
@@ -234,8 +238,7 @@ class DataExplorer:
         output_path = Path("backend/data")
         output_path.mkdir(exist_ok=True)
         
-        with open(output_path / "dashboard_data.json", "w", encoding="utf-8") as f:
-            json.dump(dashboard_data, f, indent=2, default=str)
+        save_outputs(output_path, dashboard=dashboard_data)
         
         # Sauvegarder les DataFrames
         if investment_df is not None:
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Score d'efficacité et segmentation des AP en quadrants
+Normalisation min-max, score, quadrants (np.select) et exemples par
+catégorie sont calculés sur des tableaux, sans apply ligne à ligne ni
+refiltrage par catégorie : un tri unique (catégorie, valeur) donne à la
+fois les effectifs et les k premiers de chaque catégorie.
+
+Les seuils des quadrants sont configurables : "median" (défaut), un
+quantile (0.25, 0.75...) ou une valeur absolue. Plusieurs scénarios de
+seuils sont évalués d'un coup (une ligne par scénario).
+
+Usage:
+    from efficiency_scoring import segment_aps, summarize_categories
+    ap_metrics = segment_aps(ap_metrics, fire_threshold=0.75)
+    resume = summarize_categories(ap_metrics, top_k=3)
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Ordre des codes renvoyés par assign_quadrants
+CATEGORIES = np.array([
+    "🌟 EFFICACES (Investis + Protégés)",
+    "🌱 NATURELLEMENT PROTÉGÉES (Peu investis + Peu de feux)",
+    "⚠️  SOUS PRESSION (Investis mais encore fragiles)",
+    "🚨 CRITIQUES (Peu investis + Forte déforestation)",
+], dtype=object)
+
+FIRE_COLUMN = "FIRE_par_100ha_moy"
+INVEST_COLUMN = "Financement_par_ha"
+
+
+def minmax(values, axis=0):
+    """Normalisation min-max (NaN ignorés) ; colonne constante -> NaN, comme pandas"""
+    values = np.asarray(values, dtype=np.float64)
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        # Colonne entièrement NaN : résultat NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        low = np.nanmin(values, axis=axis, keepdims=True)
+        high = np.nanmax(values, axis=axis, keepdims=True)
+        return (values - low) / (high - low)
+
+
+def threshold(values, rule="median"):
+    """Seuil(s) d'une métrique
+
+    rule : "median", un quantile dans [0, 1] (ou une liste de quantiles pour
+    plusieurs scénarios), ou {"value": v} pour un seuil absolu.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if isinstance(rule, dict):
+        return np.asarray(rule["value"], dtype=np.float64)
+    q = 0.5 if isinstance(rule, str) and rule == "median" else np.asarray(rule, dtype=np.float64)
+    if np.any((q < 0) | (q > 1)):
+        raise ValueError(f"Quantile hors de [0, 1] : {rule}")
+    if not np.isfinite(values).any():
+        return np.full(np.shape(q), np.nan)
+    return np.nanquantile(values, q)
+
+
+def assign_quadrants(fire, invest, fire_threshold, invest_threshold):
+    """Code de quadrant (indice dans CATEGORIES) de chaque AP
+
+    Seuils scalaires -> tableau (n,) ; seuils de forme (k,) -> (k, n), un
+    scénario par ligne. Valeur manquante : côté « feux élevés » / « peu
+    investi » (comparaison fausse), comme la version ligne à ligne.
+    """
+    fire = np.asarray(fire, dtype=np.float64)
+    invest = np.asarray(invest, dtype=np.float64)
+    fire_threshold = np.asarray(fire_threshold, dtype=np.float64)
+    invest_threshold = np.asarray(invest_threshold, dtype=np.float64)
+    if fire_threshold.ndim or invest_threshold.ndim:
+        fire_threshold, invest_threshold = fire_threshold[..., None], invest_threshold[..., None]
+    low_fire = fire < fire_threshold
+    high_invest = invest > invest_threshold
+    return np.select(
+        [low_fire & high_invest, low_fire, high_invest],
+        [0, 1, 2],
+        default=3,
+    )
+
+
+def efficiency_score(fire, invest, axis=0):
+    """Investissement élevé avec faible taux de feu : inv_norm * (1 - fire_norm)"""
+    return minmax(invest, axis=axis) * (1 - minmax(fire, axis=axis))
+
+
+def segment_aps(ap_metrics, fire_threshold="median", invest_threshold="median",
+                fire=FIRE_COLUMN, invest=INVEST_COLUMN):
+    """Ajouter Fire_normalized, Investment_normalized, Efficacite_Score et Categorie"""
+    out = ap_metrics.copy()
+    fire_values = out[fire].to_numpy(dtype=np.float64)
+    invest_values = out[invest].to_numpy(dtype=np.float64)
+    out["Fire_normalized"] = minmax(fire_values)
+    out["Investment_normalized"] = minmax(invest_values)
+    out["Efficacite_Score"] = out["Investment_normalized"] * (1 - out["Fire_normalized"])
+    codes = assign_quadrants(fire_values, invest_values,
+                             threshold(fire_values, fire_threshold),
+                             threshold(invest_values, invest_threshold))
+    out["Categorie"] = CATEGORIES[codes]
+    return out
+
+
+def top_k_by_group(codes, values, k=3, n_groups=None):
+    """Effectifs par groupe et indices des k plus grandes valeurs de chaque groupe
+
+    Un seul tri (groupe, valeur décroissante, ordre d'origine) ; les valeurs
+    NaN sont exclues des k premiers, comme DataFrame.nlargest.
+    Renvoie (counts, {groupe: indices}).
+    """
+    codes = np.asarray(codes, dtype=np.intp)
+    values = np.asarray(values, dtype=np.float64)
+    if n_groups is None:
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+    counts = np.bincount(codes, minlength=n_groups)
+    key = np.where(np.isnan(values), np.inf, -values)
+    order = np.lexsort((np.arange(len(codes)), key, codes))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(len(order)) - starts[codes[order]]
+    keep = (rank < k) & ~np.isnan(values[order])
+    chosen = order[keep]
+    groups = codes[chosen]
+    return counts, {g: chosen[groups == g] for g in np.unique(groups)}
+
+
+def summarize_categories(segmentation, top_k=3, by="Financement_annuel_USD"):
+    """Effectif, part et k exemples par catégorie (ordre de première apparition)
+
+    Renvoie une liste de dicts : categorie, count, percentage, examples (DataFrame).
+    """
+    labels, first, codes = np.unique(segmentation["Categorie"].to_numpy(dtype=object),
+                                     return_index=True, return_inverse=True)
+    counts, top = top_k_by_group(codes, segmentation[by].to_numpy(dtype=np.float64), top_k, len(labels))
+    total = len(segmentation)
+    return [
+        {
+            "categorie": labels[g],
+            "count": int(counts[g]),
+            "percentage": counts[g] / total * 100,
+            "examples": segmentation.iloc[top.get(g, np.array([], dtype=np.intp))],
+        }
+        for g in np.argsort(first)
+    ]
+
+
+def scenario_quadrants(fire, invest, fire_quantiles, invest_quantiles):
+    """Quadrants sous une grille de scénarios de seuils (quantiles)
+
+    Renvoie (codes (S, n), table des scénarios) avec S = len(fire_quantiles)
+    x len(invest_quantiles) ; quadrant_counts(codes) donne les effectifs.
+    """
+    fire = np.asarray(fire, dtype=np.float64)
+    invest = np.asarray(invest, dtype=np.float64)
+    fq, iq = np.meshgrid(np.asarray(fire_quantiles, dtype=np.float64),
+                         np.asarray(invest_quantiles, dtype=np.float64), indexing="ij")
+    fq, iq = fq.ravel(), iq.ravel()
+    codes = assign_quadrants(fire, invest, threshold(fire, fq), threshold(invest, iq))
+    scenarios = pd.DataFrame({"fire_quantile": fq, "invest_quantile": iq})
+    return codes, scenarios
+
+
+def quadrant_counts(codes):
+    """Effectifs (S, 4) par scénario et quadrant, en un bincount"""
+    codes = np.atleast_2d(codes)
+    offsets = np.arange(codes.shape[0])[:, None] * len(CATEGORIES)
+    return np.bincount((codes + offsets).ravel(),
+                       minlength=codes.shape[0] * len(CATEGORIES)).reshape(-1, len(CATEGORIES))
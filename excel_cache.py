@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Lecture des classeurs Excel sources avec cache binaire
+Chaque feuille est analysée une seule fois par openpyxl, puis conservée en
+pickle sous une clé (empreinte SHA-1 du classeur, feuille, options de lecture).
+Les exécutions suivantes relisent le pickle ; un classeur modifié change
+d'empreinte et est donc réanalysé. Plusieurs classeurs peuvent être lus en
+parallèle dans un pool de processus (load_sources).
+
+Usage:
+    from excel_cache import read_excel
+    df = read_excel("Fonds 2007-25.xlsx", sheet_name="Feuil2 (2)")
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pandas as pd
+
+CACHE_DIR = Path(os.environ.get("EXCEL_CACHE_DIR", Path(__file__).resolve().parent / ".cache" / "excel"))
+# EXCEL_CACHE=0 : toujours relire les classeurs (diagnostic)
+CACHE_ENABLED = os.environ.get("EXCEL_CACHE", "1") != "0"
+# Taille maximale du pool de load_sources (défaut : nombre de CPU)
+LOAD_WORKERS = int(os.environ.get("EXCEL_LOAD_WORKERS", 0)) or None
+
+_lock = threading.Lock()
+# Empreintes déjà calculées : (chemin, mtime_ns, taille) -> sha1
+_digests = {}
+stats = {"hits": 0, "misses": 0}
+
+
+def file_digest(path):
+    """SHA-1 du classeur, recalculé seulement si mtime ou taille changent"""
+    path = Path(path)
+    st = path.stat()
+    key = (str(path.resolve()), st.st_mtime_ns, st.st_size)
+    digest = _digests.get(key)
+    if digest is None:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = _digests[key] = h.hexdigest()
+    return digest
+
+
+def _cache_path(digest, sheet_name, kwargs):
+    options = json.dumps({"sheet": sheet_name, **kwargs}, sort_keys=True, default=str)
+    key = hashlib.sha1(options.encode("utf-8")).hexdigest()[:12]
+    return CACHE_DIR / digest[:16] / f"{key}.pkl"
+
+
+def _store(path, obj):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    pd.to_pickle(obj, tmp)
+    os.replace(tmp, path)
+
+
+def sheet_names(path):
+    """Noms des feuilles du classeur (mis en cache comme les feuilles)"""
+    cache_file = _cache_path(file_digest(path), "__sheet_names__", {})
+    if CACHE_ENABLED and cache_file.exists():
+        return pd.read_pickle(cache_file)
+    with pd.ExcelFile(path) as xls:
+        names = list(xls.sheet_names)
+    if CACHE_ENABLED:
+        _store(cache_file, names)
+    return names
+
+
+def read_sheet(path, sheet_name=0, **kwargs):
+    """Une feuille en DataFrame, depuis le cache si le classeur n'a pas changé"""
+    cache_file = _cache_path(file_digest(path), sheet_name, kwargs)
+    if CACHE_ENABLED and cache_file.exists():
+        try:
+            df = pd.read_pickle(cache_file)
+            with _lock:
+                stats["hits"] += 1
+            return df
+        except Exception:
+            pass  # cache illisible : on réanalyse le classeur
+
+    df = pd.read_excel(path, sheet_name=sheet_name, **kwargs)
+    with _lock:
+        stats["misses"] += 1
+    if CACHE_ENABLED:
+        _store(cache_file, df)
+    return df
+
+
+def is_cached(path, sheet_name=0, **kwargs):
+    """True si la feuille peut être servie depuis le cache sans openpyxl"""
+    try:
+        return CACHE_ENABLED and _cache_path(file_digest(path), sheet_name, kwargs).exists()
+    except OSError:
+        return False
+
+
+def read_excel(path, sheet_name=0, **kwargs):
+    """Équivalent de pd.read_excel avec cache par feuille
+
+    sheet_name=None ou liste : dict {feuille: DataFrame}, comme pandas.
+    """
+    if sheet_name is None:
+        names = sheet_names(path)
+        return {name: read_sheet(path, name, **kwargs) for name in names}
+    if isinstance(sheet_name, (list, tuple)):
+        return {name: read_sheet(path, name, **kwargs) for name in sheet_name}
+    return read_sheet(path, sheet_name, **kwargs)
+
+
+def _load_source(path, kwargs):
+    if Path(path).suffix.lower() == ".csv":
+        return pd.read_csv(path, **kwargs)
+    return read_excel(path, **kwargs)
+
+
+def _done(fn, *args):
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def load_sources(sources, max_workers=LOAD_WORKERS):
+    """Lire plusieurs fichiers sources en parallèle
+
+    sources : {nom: (chemin, options de lecture)}. Renvoie {nom: Future} :
+    future.result() rend le DataFrame ou relève l'erreur propre à ce fichier.
+    openpyxl garde le GIL : les classeurs à analyser partent dans un pool de
+    processus ; CSV et feuilles déjà en cache sont lus dans le processus courant.
+    """
+    to_parse = [
+        name for name, (path, kwargs) in sources.items()
+        if Path(path).suffix.lower() != ".csv" and not is_cached(path, **kwargs)
+    ]
+    futures = {}
+    workers = min(len(to_parse), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for name in to_parse:
+                    futures[name] = pool.submit(_load_source, *sources[name])
+                for name, (path, kwargs) in sources.items():
+                    if name not in futures:
+                        futures[name] = _done(_load_source, path, kwargs)
+                # Attendre les classeurs avant de fermer le pool ; un worker
+                # tué (mémoire, signal) casse le pool pour toutes les tâches
+                for name in to_parse:
+                    if isinstance(futures[name].exception(), BrokenProcessPool):
+                        raise futures[name].exception()
+            with _lock:
+                stats["misses"] += len(to_parse)
+        except (OSError, NotImplementedError, BrokenProcessPool) as e:
+            print(f"⚠️ Pool de processus indisponible ({e}), lecture séquentielle")
+            futures = {}
+
+    for name, (path, kwargs) in sources.items():
+        if name not in futures:
+            futures[name] = _done(_load_source, path, kwargs)
+    return {name: futures[name] for name in sources}
+
+
+def clear_cache():
+    """Supprimer toutes les feuilles en cache"""
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    _digests.clear()
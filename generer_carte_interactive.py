@@ -19,6 +19,8 @@ import json
 from pathlib import Path
 import folium
 from folium import plugins
+
+from ap_matching import APNameResolver
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -53,50 +55,25 @@ class CarteInteractiveMadagascar:
         
     def merge_data(self):
         """Fusionner coordonnées et segmentation"""
-        data = []
-        
-        for _, seg in self.segmentation.iterrows():
-            ap_name = seg['AP_Name'].upper().strip()
-            
-            # Sauter les lignes de total
-            if ap_name == 'TOTAL':
-                continue
-            
-            # Trouver les coordonnées
-            coord = None
-            for _, c in self.coords.iterrows():
-                key = str(c['Key']).upper().strip()
-                
-                # Correspondances exactes ou partielles
-                if key in ap_name or ap_name in key:
-                    coord = c
-                    break
-                    
-                # Cas spéciaux
-                if 'MONTAGNE DES FRANCAIS' in ap_name and 'MONTAGNE DES FRANCAIS' in key:
-                    coord = c
-                    break
-                if 'TSIMEMBO' in ap_name and 'TSIMEMBO' in key:
-                    coord = c
-                    break
-                if 'ITREMO' in ap_name and 'ITREMO' in key:
-                    coord = c
-                    break
-            
-            if coord is not None:
-                data.append({
-                    'name': seg['AP_Name'],
-                    'lat': coord['Latitude'],
-                    'lng': coord['Longitude'],
-                    'superficie_ha': seg['Superficie_ha'],
-                    'fire_rate': seg['FIRE_par_100ha_moy'],
-                    'financement': seg['Financement_annuel_USD'],
-                    'financement_par_ha': seg['Financement_par_ha'],
-                    'categorie': seg['Categorie'],
-                    'efficacite_score': seg['Efficacite_Score']
-                })
-        
-        return pd.DataFrame(data)
+        resolver = APNameResolver(self.coords['Key'].astype(str), containment=True)
+        coords = self.coords.assign(Key=self.coords['Key'].astype(str)).drop_duplicates('Key')
+        seg = self.segmentation
+        # Sauter les lignes de total
+        seg = seg[seg['AP_Name'].str.upper().str.strip() != 'TOTAL']
+        matches = resolver.resolve_many(seg['AP_Name'])
+        merged = seg.assign(Key=seg['AP_Name'].map(matches)).merge(coords, on='Key', how='inner')
+        
+        return pd.DataFrame({
+            'name': merged['AP_Name'],
+            'lat': merged['Latitude'],
+            'lng': merged['Longitude'],
+            'superficie_ha': merged['Superficie_ha'],
+            'fire_rate': merged['FIRE_par_100ha_moy'],
+            'financement': merged['Financement_annuel_USD'],
+            'financement_par_ha': merged['Financement_par_ha'],
+            'categorie': merged['Categorie'],
+            'efficacite_score': merged['Efficacite_Score']
+        })
     
     def get_color_from_category(self, categorie):
         """Obtenir la couleur selon la catégorie"""
@@ -18,6 +18,9 @@ import matplotlib.patches as mpatches
 from pathlib import Path
 import json
 import warnings
+
+from ap_matching import APNameResolver
+from render_cache import RenderCache, render_key
 warnings.filterwarnings('ignore')
 
 class CarteMadagascar:
@@ -27,6 +30,7 @@ class CarteMadagascar:
         self.data_path = Path(data_path)
         self.output_dir = self.data_path / "frontend/visualizations"
         self.output_dir.mkdir(exist_ok=True, parents=True)
+        self.render_cache = RenderCache()
         
     def load_data(self):
         """Charger les données"""
@@ -51,37 +55,34 @@ class CarteMadagascar:
         
     def merge_data(self):
         """Fusionner coordonnées et segmentation"""
-        data = []
-        
-        for _, seg in self.segmentation.iterrows():
-            ap_name = seg['AP_Name'].upper().strip()
-            
-            # Trouver les coordonnées
-            coord = None
-            for _, c in self.coords.iterrows():
-                key = str(c['Key']).upper().strip()
-                if key in ap_name or ap_name in key:
-                    coord = c
-                    break
-            
-            if coord is not None:
-                data.append({
-                    'name': seg['AP_Name'],
-                    'lat': coord['Latitude'],
-                    'lng': coord['Longitude'],
-                    'superficie_ha': seg['Superficie_ha'],
-                    'fire_rate': seg['FIRE_par_100ha_moy'],
-                    'financement': seg['Financement_annuel_USD'],
-                    'categorie': seg['Categorie'],
-                    'efficacite_score': seg['Efficacite_Score']
-                })
-        
-        return pd.DataFrame(data)
+        resolver = APNameResolver(self.coords['Key'].astype(str), containment=True)
+        coords = self.coords.assign(Key=self.coords['Key'].astype(str)).drop_duplicates('Key')
+        seg = self.segmentation
+        matches = resolver.resolve_many(seg['AP_Name'])
+        merged = seg.assign(Key=seg['AP_Name'].map(matches)).merge(coords, on='Key', how='inner')
+        
+        return pd.DataFrame({
+            'name': merged['AP_Name'],
+            'lat': merged['Latitude'],
+            'lng': merged['Longitude'],
+            'superficie_ha': merged['Superficie_ha'],
+            'fire_rate': merged['FIRE_par_100ha_moy'],
+            'financement': merged['Financement_annuel_USD'],
+            'categorie': merged['Categorie'],
+            'efficacite_score': merged['Efficacite_Score']
+        })
     
     def create_map(self):
         """Créer la carte principale de Madagascar"""
         print("\n🗺️  Génération de la carte Madagascar...")
         
+        output_file = self.output_dir / 'carte_madagascar_ap.png'
+        seg = self.segmentation[self.segmentation['AP_Name'] != 'TOTAL']
+        key = render_key(self.data, len(seg), seg['Financement_annuel_USD'].sum(),
+                         seg['Superficie_ha'].sum(), code=self.create_map)
+        if self.render_cache.hit(output_file, key):
+            return output_file
+        
         # Configuration de la figure
         fig, ax = plt.subplots(figsize=(16, 20))
         
@@ -252,9 +253,9 @@ class CarteMadagascar:
         plt.tight_layout()
         
         # Sauvegarder
-        output_file = self.output_dir / 'carte_madagascar_ap.png'
         plt.savefig(output_file, dpi=300, bbox_inches='tight', facecolor='white')
         plt.close()
+        self.render_cache.store(output_file, key)
         
         print(f"✅ Carte sauvegardée : {output_file}")
         return output_file
@@ -263,11 +264,16 @@ class CarteMadagascar:
         """Créer un zoom sur le nord (concentration d'AP)"""
         print("\n🔍 Génération du zoom Nord...")
         
-        fig, ax = plt.subplots(figsize=(14, 12))
-        
         # Filtrer les AP du nord
         nord = self.data[self.data['lat'] > -16]
         
+        output_file = self.output_dir / 'carte_madagascar_zoom_nord.png'
+        key = render_key(nord, code=self.create_map_zoom_nord)
+        if self.render_cache.hit(output_file, key):
+            return output_file
+        
+        fig, ax = plt.subplots(figsize=(14, 12))
+        
         couleurs = {
             '🌟 EFFICACES (Investis + Protégés)': '#2ecc71',
             '🌱 NATURELLEMENT PROTÉGÉES (Peu investis + Peu de feux)': '#a8e6cf',
@@ -327,9 +333,9 @@ class CarteMadagascar:
         
         plt.tight_layout()
         
-        output_file = self.output_dir / 'carte_madagascar_zoom_nord.png'
         plt.savefig(output_file, dpi=300, bbox_inches='tight', facecolor='white')
         plt.close()
+        self.render_cache.store(output_file, key)
         
         print(f"✅ Zoom Nord sauvegardé : {output_file}")
         return output_file
@@ -338,11 +344,16 @@ class CarteMadagascar:
         """Créer un zoom sur le sud"""
         print("\n🔍 Génération du zoom Sud...")
         
-        fig, ax = plt.subplots(figsize=(14, 12))
-        
         # Filtrer les AP du sud
         sud = self.data[self.data['lat'] < -21]
         
+        output_file = self.output_dir / 'carte_madagascar_zoom_sud.png'
+        key = render_key(sud, code=self.create_map_zoom_sud)
+        if self.render_cache.hit(output_file, key):
+            return output_file
+        
+        fig, ax = plt.subplots(figsize=(14, 12))
+        
         couleurs = {
             '🌟 EFFICACES (Investis + Protégés)': '#2ecc71',
             '🌱 NATURELLEMENT PROTÉGÉES (Peu investis + Peu de feux)': '#a8e6cf',
@@ -402,9 +413,9 @@ class CarteMadagascar:
         
         plt.tight_layout()
         
-        output_file = self.output_dir / 'carte_madagascar_zoom_sud.png'
         plt.savefig(output_file, dpi=300, bbox_inches='tight', facecolor='white')
         plt.close()
+        self.render_cache.store(output_file, key)
         
         print(f"✅ Zoom Sud sauvegardé : {output_file}")
         return output_file
@@ -423,6 +434,7 @@ class CarteMadagascar:
         # Zooms régionaux
         zoom_nord = self.create_map_zoom_nord()
         zoom_sud = self.create_map_zoom_sud()
+        self.render_cache.report()
         
         print("\n" + "="*70)
         print("✅ TOUTES LES CARTES GÉNÉRÉES AVEC SUCCÈS")
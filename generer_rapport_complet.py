@@ -7,20 +7,24 @@ Ce script génère tous les éléments nécessaires pour présenter
 l'analyse complète à votre responsable :
 
 1. Analyse statistique approfondie
-2. Visualisations professionnelles
+2. Visualisations professionnelles et cartes
 3. Rapport HTML interactif
 4. Rapport exécutif markdown
 
+Les étapes sont exécutées par pipeline_runner.py (graphe de tâches avec
+cache : seules les étapes dont les entrées ont changé sont relancées).
+
 Usage:
     python3 generer_rapport_complet.py
 """
 
-import subprocess
 import sys
 from pathlib import Path
 import webbrowser
 import time
 
+from pipeline_runner import run_pipeline, succeeded
+
 def print_header():
     """Afficher l'en-tête"""
     print("\n" + "="*80)
@@ -28,57 +32,32 @@ def print_header():
     print("    Analyse par KOUMI Dzudzogbe Prince Armand")
     print("="*80 + "\n")
 
-def run_analysis():
-    """Exécuter l'analyse statistique"""
-    print(" ÉTAPE 1/3 : Analyse Statistique Approfondie")
+def run_pipeline_steps():
+    """Exécuter le pipeline : analyse, visualisations, cartes et rapports (pipeline_runner)
+
+    Les étapes dont les entrées et le code n'ont pas changé sont sautées ;
+    les visualisations et les cartes sont produites en parallèle.
+    """
+    print(" ÉTAPE 1/2 : Analyse Statistique, Visualisations, Cartes et Rapports")
     print("-" * 80)
     
     try:
-        result = subprocess.run(
-            [sys.executable, "analyse_financement_deforestation.py"],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode == 0:
-            print(" Analyse statistique complétée avec succès\n")
-            print(result.stdout)
-            return True
-        else:
-            print("❌ Erreur lors de l'analyse statistique")
-            print(result.stderr)
-            return False
+        results = run_pipeline()
     except Exception as e:
         print(f"❌ Erreur: {e}")
         return False
-
-def generate_visualizations():
-    """Générer les visualisations"""
-    print("\n ÉTAPE 2/3 : Génération des Visualisations Professionnelles")
-    print("-" * 80)
     
-    try:
-        result = subprocess.run(
-            [sys.executable, "generer_visualisations.py"],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode == 0:
-            print("✅ Visualisations générées avec succès\n")
-            print(result.stdout)
-            return True
-        else:
-            print("❌ Erreur lors de la génération des visualisations")
-            print(result.stderr)
-            return False
-    except Exception as e:
-        print(f"❌ Erreur: {e}")
+    if not succeeded(results):
+        # Toute tâche en échec (ou bloquée par une dépendance) fait échouer le rapport
+        failed = [name for name, (status, _) in results.items() if status in ("échec", "bloquée")]
+        print(f"❌ Étapes en échec : {', '.join(failed)} (voir le rapport ci-dessus)")
         return False
+    print("✅ Analyse, visualisations et rapports à jour\n")
+    return True
 
 def open_reports():
     """Ouvrir les rapports dans le navigateur"""
-    print("\n ÉTAPE 3/3 : Ouverture des Rapports")
+    print("\n ÉTAPE 2/2 : Ouverture des Rapports")
     print("-" * 80)
     
     # Rapport HTML
@@ -164,21 +143,14 @@ def main():
         print("   Répertoire actuel : ", Path.cwd())
         sys.exit(1)
     
-    # Étape 1 : Analyse
-    if not run_analysis():
-        print("\n❌ Échec de l'analyse statistique")
-        sys.exit(1)
-    
-    time.sleep(1)
-    
-    # Étape 2 : Visualisations
-    if not generate_visualizations():
-        print("\n❌ Échec de la génération des visualisations")
+    # Étape 1 : Pipeline (analyse, visualisations, cartes)
+    if not run_pipeline_steps():
+        print("\n❌ Échec de la génération du rapport")
         sys.exit(1)
     
     time.sleep(1)
     
-    # Étape 3 : Ouvrir les rapports
+    # Étape 2 : Ouvrir les rapports
     open_reports()
     
     time.sleep(1)
@@ -1,6 +1,13 @@
 #!/usr/bin/env python3
 """
 Génération de visualisations professionnelles pour l'analyse financement-déforestation
+Les cinq figures sont indépendantes : generate_all() les rend en parallèle
+dans un pool de processus, les données étant chargées une seule fois.
+
+Usage:
+    python3 generer_visualisations.py                 # toutes les figures
+    python3 generer_visualisations.py --sans viz5     # sauf certaines
+    python3 generer_visualisations.py --workers 1     # rendu séquentiel
 """
 
 import pandas as pd
@@ -8,26 +15,74 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
+import argparse
 import json
+import multiprocessing
+import os
+import sys
+import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 warnings.filterwarnings('ignore')
 
+# Snapshot binaire partagé avec l'API (backend/data_snapshot.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+from data_snapshot import load_table
+
+# Cache de rendu : une figure dont les données et le style n'ont pas changé n'est pas redessinée
+from render_cache import RenderCache, render_key
+
 # Style professionnel
 plt.style.use('seaborn-v0_8-whitegrid')
 sns.set_palette("deep")
 sns.set_context("notebook", font_scale=1.2)
 
+# Figures indépendantes : nom court -> méthode de VisualizationGenerator
+FIGURES = {
+    "viz1": "viz1_correlation_scatter",
+    "viz2": "viz2_temporal_evolution",
+    "viz3": "viz3_segmentation_quadrant",
+    "viz4": "viz4_top_performers",
+    "viz5": "viz5_correlation_by_ap",
+}
+# Processus de rendu simultanés (défaut : nombre de CPU, 1 = séquentiel)
+RENDER_WORKERS = int(os.environ.get("VIZ_WORKERS", 0)) or None
+
+# Générateur chargé, hérité par les processus de rendu
+_shared = None
+
+
+def _init_worker(generator):
+    global _shared
+    _shared = generator
+
+
+def _render(name):
+    """(durée, statuts du cache de rendu de ce processus)"""
+    start = time.perf_counter()
+    getattr(_shared, FIGURES[name])()
+    return time.perf_counter() - start, dict(_shared.render_cache.stats)
+
+
+def _pool_context():
+    """fork quand il existe : les données chargées sont partagées sans copie"""
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
 class VisualizationGenerator:
     def __init__(self, data_path="."):
         self.data_path = Path(data_path)
         self.output_dir = self.data_path / "frontend/visualizations"
         self.output_dir.mkdir(exist_ok=True, parents=True)
+        self.render_cache = RenderCache()
         
     def load_data(self):
         """Charger les données d'analyse"""
         # Données annuelles
         yearly_path = self.data_path / "backend/data/unified_yearly.csv"
-        self.yearly_data = pd.read_csv(yearly_path)
+        self.yearly_data = load_table("yearly", yearly_path, root=self.data_path / "backend/data/snapshot")
         
         # Rapport d'analyse
         rapport_path = self.data_path / "backend/data/analyse_financement_deforestation.json"
@@ -49,6 +104,12 @@ class VisualizationGenerator:
         df_plot = df[(df['Financement_annuel_USD'] <= q99_fin) & 
                      (df['FIRE_par_100ha_moy'] <= q99_fire)]
         
+        output = self.output_dir / 'correlation_financement_deforestation.png'
+        key = render_key(df_plot[['Financement_annuel_USD', 'FIRE_par_100ha_moy', 'Année']],
+                         self.rapport['correlation'], code=self.viz1_correlation_scatter)
+        if self.render_cache.hit(output, key):
+            return
+        
         fig, ax = plt.subplots(figsize=(14, 8))
         
         # Scatter plot avec gradient de couleur par année
@@ -95,9 +156,9 @@ class VisualizationGenerator:
         ax.grid(True, alpha=0.3)
         
         plt.tight_layout()
-        plt.savefig(self.output_dir / 'correlation_financement_deforestation.png', 
-                   dpi=300, bbox_inches='tight')
+        plt.savefig(output, dpi=300, bbox_inches='tight')
         plt.close()
+        self.render_cache.store(output, key)
         
         print("   ✅ correlation_financement_deforestation.png")
     
@@ -107,6 +168,12 @@ class VisualizationGenerator:
         
         yearly = pd.DataFrame(self.rapport['yearly_trends'])
         
+        output = self.output_dir / 'evolution_temporelle.png'
+        key = render_key(yearly[['Année', 'Total_Investment', 'Avg_Fire_Rate']],
+                         code=self.viz2_temporal_evolution)
+        if self.render_cache.hit(output, key):
+            return
+        
         fig, ax1 = plt.subplots(figsize=(14, 8))
         
         # Axe 1: Investissement
@@ -154,9 +221,9 @@ class VisualizationGenerator:
                     arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0'))
         
         plt.tight_layout()
-        plt.savefig(self.output_dir / 'evolution_temporelle.png', 
-                   dpi=300, bbox_inches='tight')
+        plt.savefig(output, dpi=300, bbox_inches='tight')
         plt.close()
+        self.render_cache.store(output, key)
         
         print("   ✅ evolution_temporelle.png")
     
@@ -166,6 +233,12 @@ class VisualizationGenerator:
         
         segmentation = pd.DataFrame(self.rapport['ap_segmentation'])
         
+        output = self.output_dir / 'segmentation_ap.png'
+        key = render_key(segmentation[['Categorie', 'Financement_par_ha', 'FIRE_par_100ha_moy']],
+                         code=self.viz3_segmentation_quadrant)
+        if self.render_cache.hit(output, key):
+            return
+        
         fig, ax = plt.subplots(figsize=(14, 10))
         
         # Couleurs par catégorie
@@ -221,9 +294,9 @@ class VisualizationGenerator:
         ax.grid(True, alpha=0.3)
         
         plt.tight_layout()
-        plt.savefig(self.output_dir / 'segmentation_ap.png', 
-                   dpi=300, bbox_inches='tight')
+        plt.savefig(output, dpi=300, bbox_inches='tight')
         plt.close()
+        self.render_cache.store(output, key)
         
         print("   ✅ segmentation_ap.png")
     
@@ -237,6 +310,11 @@ class VisualizationGenerator:
         top10 = segmentation.nlargest(10, 'Efficacite_Score')[['AP_Name', 'Efficacite_Score']]
         bottom10 = segmentation.nsmallest(10, 'Efficacite_Score')[['AP_Name', 'Efficacite_Score']]
         
+        output = self.output_dir / 'top_bottom_performers.png'
+        key = render_key(top10, bottom10, code=self.viz4_top_performers)
+        if self.render_cache.hit(output, key):
+            return
+        
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 8))
         
         # Top 10
@@ -270,9 +348,9 @@ class VisualizationGenerator:
                     f'{width:.3f}', ha='right', va='center', fontsize=9)
         
         plt.tight_layout()
-        plt.savefig(self.output_dir / 'top_bottom_performers.png', 
-                   dpi=300, bbox_inches='tight')
+        plt.savefig(output, dpi=300, bbox_inches='tight')
         plt.close()
+        self.render_cache.store(output, key)
         
         print("   ✅ top_bottom_performers.png")
     
@@ -291,6 +369,11 @@ class VisualizationGenerator:
         
         combined = pd.concat([top15, bottom15]).sort_values('correlation')
         
+        output = self.output_dir / 'correlation_par_ap.png'
+        key = render_key(combined[['AP', 'correlation']], code=self.viz5_correlation_by_ap)
+        if self.render_cache.hit(output, key):
+            return
+        
         fig, ax = plt.subplots(figsize=(12, 10))
         
         # Couleurs selon le signe
@@ -316,25 +399,56 @@ class VisualizationGenerator:
         ax.grid(axis='x', alpha=0.3)
         
         plt.tight_layout()
-        plt.savefig(self.output_dir / 'correlation_par_ap.png', 
-                   dpi=300, bbox_inches='tight')
+        plt.savefig(output, dpi=300, bbox_inches='tight')
         plt.close()
+        self.render_cache.store(output, key)
         
         print("   ✅ correlation_par_ap.png")
     
-    def generate_all(self):
-        """Générer toutes les visualisations"""
+    def render(self, names, workers=RENDER_WORKERS):
+        """Rendre les figures demandées ; renvoie {nom: durée en secondes}
+
+        Plusieurs processus seulement s'il y a plusieurs figures et plusieurs
+        CPU ; chaque processus reçoit le générateur déjà chargé (lecture seule).
+        """
+        workers = min(len(names), workers or os.cpu_count() or 1)
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(),
+                                         initializer=_init_worker, initargs=(self,)) as pool:
+                    futures = {name: pool.submit(_render, name) for name in names}
+                    return self._collect({name: future.result() for name, future in futures.items()})
+            except (OSError, NotImplementedError) as e:
+                print(f"⚠️ Pool de processus indisponible ({e}), rendu séquentiel")
+        
+        _init_worker(self)
+        return self._collect({name: _render(name) for name in names})
+    
+    def _collect(self, results):
+        """Durées par figure ; statuts du cache remontés des processus de rendu"""
+        for _, stats in results.values():
+            self.render_cache.stats.update(stats)
+        return {name: elapsed for name, (elapsed, _) in results.items()}
+    
+    def generate_all(self, workers=RENDER_WORKERS, skip=()):
+        """Générer toutes les visualisations (sauf celles de skip, ex. {"viz5"})"""
         print("\n🎨 GÉNÉRATION DES VISUALISATIONS PROFESSIONNELLES")
         print("=" * 70)
         
+        unknown = set(skip) - set(FIGURES)
+        if unknown:
+            raise ValueError(f"Figures inconnues : {', '.join(sorted(unknown))}")
+        names = [name for name in FIGURES if name not in skip]
+        
         self.load_data()
         
-        self.viz1_correlation_scatter()
-        self.viz2_temporal_evolution()
-        self.viz3_segmentation_quadrant()
-        self.viz4_top_performers()
-        self.viz5_correlation_by_ap()
+        start = time.perf_counter()
+        durations = self.render(names, workers)
+        elapsed = time.perf_counter() - start
         
+        print(f"\n⏱️  {len(durations)} figures en {elapsed:.1f}s "
+              f"(somme des rendus {sum(durations.values()):.1f}s)")
+        self.render_cache.report()
         print("\n" + "=" * 70)
         print("✅ TOUTES LES VISUALISATIONS GÉNÉRÉES")
         print(f"📁 Dossier: {self.output_dir}")
@@ -342,6 +456,13 @@ class VisualizationGenerator:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Visualisations financement-déforestation")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS,
+                        help="processus de rendu (défaut : nombre de CPU)")
+    parser.add_argument("--sans", nargs="+", default=[], choices=sorted(FIGURES),
+                        help="figures à ne pas générer")
+    args = parser.parse_args()
+    
     generator = VisualizationGenerator()
-    generator.generate_all()
+    generator.generate_all(workers=args.workers, skip=args.sans)
 
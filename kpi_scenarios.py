@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Sensibilité du classement des AP aux pondérations du Score_global
+Score_global = 0.4*S_IPC + 0.4*S_FCL + 0.2*S_FIRE (pipeline_kpi_ap.py).
+Une grille de vecteurs de poids (simplexe, pas configurable) est évaluée
+d'un coup : scores = S (AP x 3) @ W.T (3 x scénarios), puis classements par
+argsort le long de l'axe des AP. Pour chaque AP : rang de référence, rang
+moyen, écart-type, min / max, percentiles et part des scénarios où l'AP
+reste dans le top k.
+
+Les composantes S_* sont relues depuis l'agrégat en cache du pipeline KPI
+(.cache/kpi_incremental.pkl) ou, à défaut, depuis AP_Synthese_clean.xlsx :
+le pipeline n'est pas relancé.
+
+Usage:
+    python kpi_scenarios.py                  # grille au pas de 0.05 (231 scénarios)
+    python kpi_scenarios.py --pas 0.01 --top 20 --sortie AP_Stabilite_classement.xlsx
+"""
+
+import argparse
+import hashlib
+import itertools
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from excel_cache import read_excel
+
+# Pondérations de référence du Score_global
+POIDS_SCORE = {"S_IPC": 0.4, "S_FCL": 0.4, "S_FIRE": 0.2}
+COMPOSANTES = list(POIDS_SCORE)
+# Indicateur (moyenne par AP) d'où est tirée chaque composante
+SOURCES_COMPOSANTES = {"S_IPC": "IPC_moy", "S_FCL": "FCL_pct_moy", "S_FIRE": "FIRE_par_100ha_moy"}
+
+ETAT_KPI = Path(".cache") / "kpi_incremental.pkl"
+SYNTHESE = Path("AP_Synthese_clean.xlsx")
+
+eps = 1e-6
+def norm_inverse(series):
+    mx = max(series.max(), eps)
+    return 1 - (series / (mx + eps))
+
+def add_scores(agg, poids=POIDS_SCORE):
+    """Scores normalisés sur l'ensemble des AP (le maximum peut changer à chaque mise à jour)"""
+    for composante, source in SOURCES_COMPOSANTES.items():
+        agg[composante] = norm_inverse(agg[source])
+    agg["Score_global"] = sum(w * agg[composante] for composante, w in poids.items())
+    return agg
+
+
+def load_components(data_path="."):
+    """(clés AP, matrice S AP x composantes) depuis l'agrégat en cache ou la synthèse exportée"""
+    data_path = Path(data_path)
+    etat, script = data_path / ETAT_KPI, data_path / "pipeline_kpi_ap.py"
+    agg = None
+    if etat.exists() and script.exists():
+        try:
+            state = pd.read_pickle(etat)
+            # État écrit par la version courante du pipeline uniquement
+            if state.get("code") == hashlib.sha1(script.read_bytes()).hexdigest():
+                agg = add_scores(state["agg"].copy())
+        except Exception:
+            agg = None
+    if agg is None:
+        agg = read_excel(data_path / SYNTHESE)
+        if not set(COMPOSANTES) <= set(agg.columns):
+            agg = add_scores(agg)
+    return agg["Key"].to_numpy(dtype=object), agg[COMPOSANTES].to_numpy(dtype=np.float64)
+
+
+def weight_grid(step=0.05, n_components=len(COMPOSANTES)):
+    """Tous les vecteurs de poids >= 0 de somme 1 au pas donné (une ligne par scénario)"""
+    steps = int(round(1 / step))
+    if not np.isclose(steps * step, 1):
+        raise ValueError(f"Le pas doit diviser 1 : {step}")
+    combos = [c for c in itertools.product(range(steps + 1), repeat=n_components - 1) if sum(c) <= steps]
+    head = np.array(combos, dtype=np.float64).reshape(-1, n_components - 1)
+    return np.column_stack([head, steps - head.sum(axis=1)]) / steps
+
+
+def rank_matrix(scores):
+    """Rang (1 = meilleur score) de chaque AP dans chaque scénario ; scores (AP x scénarios)
+
+    NaN classés en dernier ; ex aequo départagés par l'ordre des AP.
+    """
+    order = np.argsort(np.where(np.isnan(scores), np.inf, -scores), axis=0, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, scores.shape[0] + 1)[:, None], axis=0)
+    return ranks
+
+
+def run_scenarios(keys, components, weights, reference=None, top=10):
+    """Scores et rangs de tous les scénarios, statistiques de stabilité par AP
+
+    weights : (scénarios x composantes). reference : poids de référence
+    (défaut POIDS_SCORE). Renvoie (stabilité par AP, rangs AP x scénarios).
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    reference = np.asarray(list(POIDS_SCORE.values()) if reference is None else reference, dtype=np.float64)
+    scores = components @ np.vstack([reference, weights]).T
+    ranks = rank_matrix(scores)
+    base, ranks = ranks[:, 0], ranks[:, 1:]
+
+    p5, median, p95 = np.percentile(ranks, [5, 50, 95], axis=1)
+    stabilite = pd.DataFrame({
+        "Key": keys,
+        "Score_reference": scores[:, 0],
+        "Rang_reference": base,
+        "Rang_moyen": ranks.mean(axis=1),
+        "Rang_ecart_type": ranks.std(axis=1),
+        "Rang_min": ranks.min(axis=1),
+        "Rang_max": ranks.max(axis=1),
+        "Rang_p5": p5,
+        "Rang_median": median,
+        "Rang_p95": p95,
+        "Ecart_max_reference": np.abs(ranks - base[:, None]).max(axis=1),
+        f"Part_top{top}": (ranks <= top).mean(axis=1),
+    })
+    return stabilite.sort_values("Rang_reference").reset_index(drop=True), ranks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sensibilité du classement aux pondérations du Score_global")
+    parser.add_argument("--pas", type=float, default=0.05, help="pas de la grille de poids (défaut 0.05)")
+    parser.add_argument("--top", type=int, default=10, help="taille du top suivi (défaut 10)")
+    parser.add_argument("--sortie", help="export Excel des statistiques de stabilité")
+    args = parser.parse_args()
+
+    keys, components = load_components()
+    weights = weight_grid(args.pas)
+    debut = time.perf_counter()
+    stabilite, _ = run_scenarios(keys, components, weights, top=args.top)
+    duree = time.perf_counter() - debut
+
+    print(f"🎛️  {len(weights)} pondérations x {len(keys)} AP évaluées en {duree * 1000:.1f} ms")
+    print(f"   Référence : " + ", ".join(f"{c}={w}" for c, w in POIDS_SCORE.items()))
+    colonnes = ["Key", "Rang_reference", "Rang_moyen", "Rang_min", "Rang_max", f"Part_top{args.top}"]
+    print(f"\n🏆 TOP {args.top} DE RÉFÉRENCE ET STABILITÉ:")
+    print(stabilite[colonnes].head(args.top).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print(f"\n⚠️  AP LES PLUS SENSIBLES AUX POIDS (écart-type du rang):")
+    print(stabilite.nlargest(args.top, "Rang_ecart_type")[colonnes + ["Rang_ecart_type"]]
+          .to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+    if args.sortie:
+        stabilite.to_excel(args.sortie, index=False)
+        print(f"\n✔ Stabilité du classement : {args.sortie}")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Normalisation des noms d'aires protégées (clés de jointure)
+Motifs précompilés et table str.translate unique ; chaque nom brut n'est
+normalisé qu'une fois par processus (mémoïsation). normalize_series()
+travaille sur les valeurs distinctes d'une colonne : le coût dépend du
+nombre de noms différents, pas du nombre de lignes.
+
+Usage:
+    from name_normalizer import normalize_text, normalize_series
+    normalize_text("Montagne des Français (PN)")   # -> "MONTAGNE DES FRANCAIS"
+    an["Key"] = normalize_series(an["Site"])
+"""
+
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+_PARENS = re.compile(r"\(.*?\)")
+_SPACES = re.compile(r"\s+")
+
+# Accents -> lettre de base, ponctuation et séparateurs -> espace
+_ACCENTS = {
+    "É": "E", "È": "E", "Ê": "E", "Ë": "E",
+    "À": "A", "Â": "A", "Ä": "A",
+    "Î": "I", "Ï": "I",
+    "Ô": "O", "Ö": "O",
+    "Ù": "U", "Û": "U", "Ü": "U",
+    "Ç": "C",
+}
+_TRANSLATION = str.maketrans({
+    **_ACCENTS,
+    **{ch: " " for ch in "’`'_.,;:!?"},
+    **{ch: " " for ch in "-/"},
+})
+
+
+@lru_cache(maxsize=None)
+def _normalize_str(s):
+    s = _PARENS.sub("", s.upper().strip())
+    s = s.translate(_TRANSLATION)
+    return _SPACES.sub(" ", s).strip()
+
+
+def normalize_text(x):
+    """Clé normalisée : majuscules, sans accents, parenthèses ni ponctuation"""
+    if x is None or (isinstance(x, float) and np.isnan(x)):
+        return ""
+    return _normalize_str(str(x))
+
+
+def normalize_series(series):
+    """normalize_text appliqué à une Series, une fois par valeur distincte"""
+    codes, uniques = pd.factorize(series)
+    keys = np.array([normalize_text(value) for value in uniques] + [""], dtype=object)
+    # Code -1 (valeur manquante) -> dernière case : ""
+    return pd.Series(keys[codes], index=series.index, name=series.name)
+
+
+def cache_info():
+    """Statistiques de la mémoïsation (hits, misses, taille)"""
+    return _normalize_str.cache_info()
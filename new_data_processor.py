@@ -9,11 +9,17 @@ Utilise les fichiers spécifiés par l'utilisateur :
 - AP_coords.csv (coordonnées GPS)
 """
 
-import pandas as pd
-import json
 import numpy as np
 from pathlib import Path
 import logging
+import sys
+
+# Lecture des classeurs avec cache binaire (excel_cache.py)
+from excel_cache import load_sources
+
+# Snapshot binaire partagé avec l'API (backend/data_snapshot.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+from data_snapshot import save_outputs
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -32,9 +38,19 @@ class NewDataProcessor:
         """Charger toutes les données selon les spécifications"""
         logger.info("🔄 Chargement des données selon les nouvelles spécifications...")
         
+        # Lectures indépendantes lancées en parallèle ; chaque fichier garde son rapport d'erreur
+        sources = load_sources({
+            "annuel": (self.data_path / "AP_Annuel_clean.xlsx", {}),
+            "classement": (self.data_path / "AP_Classement_clean.xlsx", {}),
+            "synthese": (self.data_path / "AP_Synthese_clean.xlsx", {}),
+            "outlook": (self.data_path / "OutLook 2024 data Analyse deforestation & fires.xlsx",
+                        {"sheet_name": "14 MAY data"}),
+            "coords": (self.data_path / "AP_coords.csv", {}),
+        })
+        
         # 1. AP_Annuel_clean.xlsx - Données annuelles
         try:
-            self.ap_annuel = pd.read_excel(self.data_path / "AP_Annuel_clean.xlsx")
+            self.ap_annuel = sources["annuel"].result()
             logger.info(f"✅ AP_Annuel_clean.xlsx chargé: {len(self.ap_annuel)} lignes")
             logger.info(f"   Colonnes: {list(self.ap_annuel.columns)}")
             logger.info(f"   APs uniques: {self.ap_annuel['Key'].nunique()}")
@@ -43,7 +59,7 @@ class NewDataProcessor:
             
         # 2. AP_Classement_clean.xlsx - Classements
         try:
-            self.ap_classement = pd.read_excel(self.data_path / "AP_Classement_clean.xlsx")
+            self.ap_classement = sources["classement"].result()
             logger.info(f"✅ AP_Classement_clean.xlsx chargé: {len(self.ap_classement)} lignes")
             logger.info(f"   Colonnes: {list(self.ap_classement.columns)}")
             logger.info(f"   APs uniques: {self.ap_classement['Key'].nunique()}")
@@ -52,7 +68,7 @@ class NewDataProcessor:
             
         # 3. AP_Synthese_clean.xlsx - Synthèse
         try:
-            self.ap_synthese = pd.read_excel(self.data_path / "AP_Synthese_clean.xlsx")
+            self.ap_synthese = sources["synthese"].result()
             logger.info(f"✅ AP_Synthese_clean.xlsx chargé: {len(self.ap_synthese)} lignes")
             logger.info(f"   Colonnes: {list(self.ap_synthese.columns)}")
             logger.info(f"   APs uniques: {self.ap_synthese['Key'].nunique()}")
@@ -61,10 +77,7 @@ class NewDataProcessor:
             
         # 4. OutLook 2024 data - Sheet '14 MAY data'
         try:
-            self.outlook_data = pd.read_excel(
-                self.data_path / "OutLook 2024 data Analyse deforestation & fires.xlsx", 
-                sheet_name="14 MAY data"
-            )
+            self.outlook_data = sources["outlook"].result()
             # Filtrer les lignes valides
             self.outlook_data = self.outlook_data[self.outlook_data['Terrestrial Protected Area Name'].notna()]
             logger.info(f"✅ OutLook 2024 '14 MAY data' chargé: {len(self.outlook_data)} lignes")
@@ -75,7 +88,7 @@ class NewDataProcessor:
             
         # 5. AP_coords.csv - Coordonnées GPS
         try:
-            coords_df = pd.read_csv(self.data_path / "AP_coords.csv")
+            coords_df = sources["coords"].result()
             self.ap_coords = {}
             for _, row in coords_df.iterrows():
                 self.ap_coords[row['Key'].strip().upper()] = {
@@ -228,14 +241,9 @@ class NewDataProcessor:
         
         # Sauvegarder les fichiers
         output_path = Path("backend/data")
-        output_path.mkdir(exist_ok=True)
         
-        # Sauvegarder dashboard_data.json
-        with open(output_path / "dashboard_data.json", "w", encoding="utf-8") as f:
-            json.dump(dashboard_data, f, indent=2, default=str)
-            
-        # Sauvegarder unified_yearly.csv
-        yearly_data.to_csv(output_path / "unified_yearly.csv", index=False)
+        # Snapshot binaire + exports dashboard_data.json / unified_yearly.csv
+        save_outputs(output_path, yearly_df=yearly_data, dashboard=dashboard_data)
         
         logger.info("✅ Données du dashboard générées avec succès!")
         logger.info(f"📊 Aires protégées terrestres: {total_protected_areas}")
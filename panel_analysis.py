@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Effets retardés du financement : panel AP x année
+Question : le financement de l'année t réduit-il les feux / la perte de
+couvert (FCL) en t+1, t+2, t+3 ?
+
+Le tableau annuel est rangé en matrices (AP x années) sur la grille complète
+(années manquantes -> NaN) : un retard k est un simple décalage de colonnes,
+sans boucle par AP ni confusion entre années non contiguës. Chaque couple
+(cible, retard) est une régression à effets fixes AP et année :
+
+    y[i, t+k] = b * financement[i, t] + c * y[i, t] + a_i + g_t + e
+
+Les effets fixes sont retirés par projections alternées (moyennes AP puis
+année, sur les cases observées) et toutes les spécifications sont résolues
+ensemble (équations normales empilées, np.linalg.solve par lot). Erreurs
+types robustes groupées par AP.
+
+Usage:
+    from panel_analysis import lagged_effects
+    effets = lagged_effects(yearly_df, lags=(1, 2, 3))
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+DEFAULT_TARGETS = ("FIRE_par_100ha_moy", "FCL_pct_surface")
+DEFAULT_LAGS = (1, 2, 3)
+# Financement exprimé en millions : coefficient = effet d'un million supplémentaire
+FUNDING_SCALE = 1e6
+FE_ITERATIONS = 200
+FE_TOLERANCE = 1e-10
+# Variance intra-AP résiduelle sous ce seuil (relatif) : effet non identifiable
+MIN_WITHIN_VARIANCE = 1e-10
+
+
+def panel_matrices(df, entity, time, x, targets):
+    """(AP, années, X, {cible: Y}) ; X somme les financements d'une case, Y en fait la moyenne"""
+    codes, keys = pd.factorize(df[entity])
+    years = df[time].to_numpy(dtype=np.int64)
+    valid = codes >= 0
+    first = int(years[valid].min()) if valid.any() else 0
+    span = int(years[valid].max()) - first + 1 if valid.any() else 0
+    cell = codes[valid] * span + (years[valid] - first)
+    size = len(keys) * span
+
+    def cell_reduce(values, mean):
+        values = np.asarray(values, dtype=np.float64)[valid]
+        present = ~np.isnan(values)
+        sums = np.bincount(cell[present], weights=values[present], minlength=size)
+        counts = np.bincount(cell[present], minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = np.where(counts > 0, sums / counts if mean else sums, np.nan)
+        return out.reshape(len(keys), span)
+
+    X = cell_reduce(df[x], mean=False)
+    Y = {target: cell_reduce(df[target], mean=True) for target in targets}
+    return np.asarray(keys), np.arange(first, first + span), X, Y
+
+
+def _shift(matrix, k):
+    """Colonne t <- colonne t+k (NaN au-delà de la dernière année)"""
+    out = np.full_like(matrix, np.nan)
+    # Retard >= nombre d'années : aucune année t+k observée, tout reste NaN
+    if k < matrix.shape[1]:
+        out[:, :matrix.shape[1] - k] = matrix[:, k:]
+    return out
+
+
+def _within(values, mask, time_effects):
+    """Retirer effets AP (et année) des cases observées ; values (S, A, T, p)"""
+    w = mask[..., None].astype(np.float64)
+    v = values * w
+    n_entity = np.maximum(w.sum(axis=2, keepdims=True), 1)
+    n_time = np.maximum(w.sum(axis=1, keepdims=True), 1)
+    for _ in range(FE_ITERATIONS if time_effects else 1):
+        v = v - w * v.sum(axis=2, keepdims=True) / n_entity
+        if not time_effects:
+            break
+        time_means = v.sum(axis=1, keepdims=True) / n_time
+        v = v - w * time_means
+        if np.abs(time_means).max(initial=0.0) <= FE_TOLERANCE * max(np.abs(v).max(initial=0.0), 1.0):
+            break
+    return v
+
+
+def lagged_effects(df, entity="AP_Name", time="Année", x="Financement_annuel_USD",
+                   targets=DEFAULT_TARGETS, lags=DEFAULT_LAGS, control_current=True,
+                   time_effects=True, confidence=0.95):
+    """Effet du financement en t sur chaque cible en t+k, pour tous les retards à la fois
+
+    Renvoie un DataFrame, une ligne par (cible, retard) : coef (par million),
+    se (groupée par AP), t, p_value, ci_low, ci_high, n_obs, n_ap, r2_within,
+    identifiable (False si la cible ne varie pas au sein des AP).
+    """
+    targets = [t for t in targets if t in df.columns]
+    keys, years, X, Y = panel_matrices(df, entity, time, x, targets)
+    specs = [(target, k) for target in targets for k in lags]
+    columns = ["target", "lag", "coef", "se", "t", "p_value", "ci_low", "ci_high",
+               "n_obs", "n_ap", "r2_within", "identifiable"]
+    if not specs or X.size == 0:
+        return pd.DataFrame(columns=columns)
+
+    # Empilement (S, A, T) : financement et cible courante en t, cible en t+k
+    funding = np.stack([X / FUNDING_SCALE for _ in specs])
+    outcome = np.stack([_shift(Y[target], k) for target, k in specs])
+    regressors = [funding]
+    if control_current:
+        regressors.append(np.stack([Y[target] for target, _ in specs]))
+    Z = np.stack(regressors, axis=-1)
+    mask = np.isfinite(outcome) & np.isfinite(Z).all(axis=-1)
+    p = Z.shape[-1]
+
+    Zd = _within(np.where(mask[..., None], Z, 0.0), mask, time_effects)
+    yd = _within(np.where(mask, outcome, 0.0)[..., None], mask, time_effects)[..., 0]
+
+    # Équations normales empilées
+    ZtZ = np.einsum("satp,satq->spq", Zd, Zd)
+    Zty = np.einsum("satp,sat->sp", Zd, yd)
+    observed = np.where(mask, outcome, np.nan)
+    with np.errstate(invalid="ignore"):
+        centered = np.where(mask, observed - np.nanmean(observed, axis=(1, 2), keepdims=True), 0.0)
+    total_ss = np.einsum("sat,sat->s", centered, centered)
+    within_ss = np.einsum("sat,sat->s", yd, yd)
+    scale = np.maximum(np.einsum("spp->sp", ZtZ).max(axis=1), 1e-300)
+    identifiable = ((within_ss > MIN_WITHIN_VARIANCE * np.maximum(total_ss, 1e-300))
+                    & (np.abs(np.linalg.det(ZtZ / scale[:, None, None])) > 1e-12))
+    safe = np.where(identifiable[:, None, None], ZtZ, np.eye(p))
+    beta = np.linalg.solve(safe, np.where(identifiable[:, None], Zty, 0.0)[..., None])[..., 0]
+
+    # Résidus et variance robuste groupée par AP
+    resid = (yd - np.einsum("satp,sp->sat", Zd, beta)) * mask
+    scores = np.einsum("satp,sat->sap", Zd, resid)
+    meat = np.einsum("sap,saq->spq", scores, scores)
+    bread = np.linalg.inv(safe)
+    n_obs = mask.sum(axis=(1, 2))
+    n_ap = (mask.sum(axis=2) > 0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correction = (n_ap / (n_ap - 1)) * ((n_obs - 1) / (n_obs - p))
+        cov = bread @ meat @ bread * correction[:, None, None]
+        se = np.sqrt(cov[:, 0, 0])
+        coef = beta[:, 0]
+        t_stat = coef / se
+        r2 = 1 - np.einsum("sat,sat->s", resid, resid) / within_ss
+    dof = np.maximum(n_ap - 1, 1)
+    p_value = 2 * stats.t.sf(np.abs(t_stat), dof)
+    half_width = stats.t.ppf(0.5 + confidence / 2, dof) * se
+
+    result = pd.DataFrame({
+        "target": [target for target, _ in specs],
+        "lag": [k for _, k in specs],
+        "coef": coef,
+        "se": se,
+        "t": t_stat,
+        "p_value": p_value,
+        "ci_low": coef - half_width,
+        "ci_high": coef + half_width,
+        "n_obs": n_obs,
+        "n_ap": n_ap,
+        "r2_within": r2,
+        "identifiable": identifiable,
+    }, columns=columns)
+    estimates = ["coef", "se", "t", "p_value", "ci_low", "ci_high", "r2_within"]
+    result.loc[~result["identifiable"], estimates] = np.nan
+    return result
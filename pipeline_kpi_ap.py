@@ -5,43 +5,102 @@ Pipeline KPI Aires Protégées (corrigé)
 """
 
 import pandas as pd
-import numpy as np
+import hashlib
+import os
 import re
-from fuzzywuzzy import process
-
-# ----------------------
-# 1) Normalisation des textes
-# ----------------------
-def normalize_text(x: str) -> str:
-    if x is None or (isinstance(x, float) and np.isnan(x)):
-        return ""
-    s = str(x).upper().strip()
-    s = re.sub(r"\(.*?\)", "", s)
-    mapping = {
-        "É":"E","È":"E","Ê":"E","Ë":"E",
-        "À":"A","Â":"A","Ä":"A",
-        "Î":"I","Ï":"I",
-        "Ô":"O","Ö":"O",
-        "Ù":"U","Û":"U","Ü":"U",
-        "Ç":"C",
-    }
-    for k,v in mapping.items():
-        s = s.replace(k,v)
-    s = re.sub(r"[’`'_.,;:!?]", " ", s)
-    s = re.sub(r"[-/]", " ", s)
-    s = re.sub(r"\s+", " ", s)
-    return s.strip()
+from pathlib import Path
+
+from excel_cache import read_excel
+from ap_matching import APNameResolver
+from name_normalizer import normalize_text, normalize_series
+# Score_global et pondérations (partagés avec l'analyse de sensibilité)
+from kpi_scenarios import add_scores
+
+# Financement d'une convention partagée entre plusieurs AP ("A / B") :
+# False = montant attribué en entier à chaque AP (comportement historique),
+# True = montant réparti à parts égales entre les AP
+REPARTIR_COFINANCEMENT = False
+
+# Score minimal (0-100, échelle d'APNameResolver) pour rattacher un nom de site
+# à une AP de l'analyse. 80 reproduit les rattachements de l'ancien seuil
+# fuzzywuzzy (score >= 90) : mêmes correspondances de 70 à 84 sur les classeurs
+# actuels, au-delà de 84 "GALOKO KALIBINONO" n'est plus rattachée.
+# KPI_SEUIL_CORRESPONDANCE pour le régler
+SEUIL_CORRESPONDANCE = float(os.environ.get("KPI_SEUIL_CORRESPONDANCE", 80))
+
+# Mode incrémental : seules les AP dont une partition (AP x année) a changé
+# sont recalculées ; KPI_INCREMENTAL=0 force un recalcul complet
+MODE_INCREMENTAL = os.environ.get("KPI_INCREMENTAL", "1") != "0"
+ETAT_INCREMENTAL = Path(".cache") / "kpi_incremental.pkl"
+
+INPUT_COLS = ["Superficie_ha", "FCL_ha", "FIRE_alerts", "Financement"]
+KPI_COLS = ["FIRE_par_100ha", "FCL_pct_surface", "Financement_par_ha",
+            "FCL_pct_variation", "FIRE_per_fin", "IPC"]
+ROW_KEY = ["Key", "Annee", "_occ"]
+
+def code_version():
+    """Empreinte de ce script : toute modification invalide l'état incrémental"""
+    return hashlib.sha1(Path(__file__).read_bytes()).hexdigest()
+
+def load_state():
+    """État de l'exécution précédente, None s'il est absent ou périmé"""
+    if not ETAT_INCREMENTAL.exists():
+        return None
+    try:
+        state = pd.read_pickle(ETAT_INCREMENTAL)
+    except Exception:
+        return None
+    return state if state.get("code") == code_version() else None
+
+def save_state(state):
+    ETAT_INCREMENTAL.parent.mkdir(parents=True, exist_ok=True)
+    pd.to_pickle({**state, "code": code_version()}, ETAT_INCREMENTAL)
+
+def frame_digest(frame):
+    """Empreinte du contenu d'un export (colonnes, ordre et valeurs)"""
+    h = hashlib.sha1("|".join(map(str, frame.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def compute_kpis(rows):
+    """KPI ligne à ligne ; rows doit contenir toutes les années de chaque AP"""
+    kpis = pd.DataFrame(index=rows.index)
+    kpis["FIRE_par_100ha"] = (rows["FIRE_alerts"] / (rows["Superficie_ha"]+1e-6))*100
+    kpis["FCL_pct_surface"] = (rows["FCL_ha"] / (rows["Superficie_ha"]+1e-6))*100
+    kpis["Financement_par_ha"] = rows["Financement"] / (rows["Superficie_ha"]+1e-6)
+    kpis["FCL_pct_variation"] = kpis["FCL_pct_surface"].groupby(rows["Key"]).diff()
+    kpis["FIRE_per_fin"] = rows["FIRE_alerts"] / (rows["Financement"]+1e-6)
+    kpis["IPC"] = kpis["FCL_pct_surface"] / (kpis["Financement_par_ha"]+1e-6)
+    return kpis
+
+def aggregate(rows):
+    return rows.groupby("Key").agg(
+        Superficie_ha=("Superficie_ha","first"),
+        Financement_total_annuel=("Financement","sum"),
+        Financement_par_ha_moy=("Financement_par_ha","mean"),
+        FCL_pct_moy=("FCL_pct_surface","mean"),
+        FCL_pct_var_moy=("FCL_pct_variation","mean"),
+        FCL_ha_total=("FCL_ha","sum"),
+        FIRE_total=("FIRE_alerts","sum"),
+        FIRE_par_100ha_moy=("FIRE_par_100ha","mean"),
+        FIRE_per_fin_moy=("FIRE_per_fin","mean"),
+        IPC_moy=("IPC","mean"),
+    ).reset_index()
+
+# ----------------------
+# 1) Normalisation des textes : name_normalizer (mémoïsée, une fois par nom distinct)
+# ----------------------
 
 # ----------------------
 # 2) Chargement des données déforestation & feux
 # ----------------------
 file_outlook = "OutLook 2024 data Analyse deforestation & fires.xlsx"
-an = pd.read_excel(file_outlook, sheet_name="Analysis")
+an = read_excel(file_outlook, sheet_name="Analysis")
 an = an.rename(columns={
     'Terrestrial Protected Area Name\n(Yellow are Ramsar Sites)': 'Site',
     'PA area (Ha)': 'Superficie_ha',
 })
-an["Key"] = an["Site"].apply(normalize_text)
+an["Key"] = normalize_series(an["Site"])
 
 # Colonnes FCL
 fcl_year_map = {}
@@ -69,47 +128,54 @@ fire["FIRE_alerts"] = pd.to_numeric(fire["FIRE_alerts"], errors="coerce").fillna
 # 3) Chargement financements
 # ----------------------
 file_fonds = "Fonds 2007-25.xlsx"
-fonds = pd.read_excel(file_fonds, sheet_name=1).rename(columns={"Nom AP": "Site"})
+fonds = read_excel(file_fonds, sheet_name=1).rename(columns={"Nom AP": "Site"})
+
+# Colonnes annuelles
+year_cols = [c for c in fonds.columns if isinstance(c, str) and c.startswith("Fonds totale en ")]
 
 # Expansion des AP multiples (séparés par "/")
-expanded_rows = []
-for _, row in fonds.iterrows():
-    sites_split = re.split(r"[/]", str(row["Site"]))
-    for site in sites_split:
-        site_clean = site.strip()
-        if site_clean and "COORDINATION" not in site_clean.upper():
-            new_row = row.copy()
-            new_row["Site"] = site_clean
-            expanded_rows.append(new_row)
-fonds_expanded = pd.DataFrame(expanded_rows)
+def expand_sites(fonds, amount_cols=(), apportion=False):
+    """Une ligne par site d'une convention "A / B", colonnes et types conservés
+
+    apportion=True : les montants (amount_cols) sont répartis à parts égales
+    entre les sites cofinancés au lieu d'être dupliqués.
+    """
+    # map(str) comme l'ancienne boucle : un nom manquant devient "nan"
+    expanded = fonds.assign(Site=fonds["Site"].map(str).str.split("/")).explode("Site")
+    expanded["Site"] = expanded["Site"].str.strip()
+    keep = (expanded["Site"] != "") & ~expanded["Site"].str.upper().str.contains("COORDINATION", regex=False)
+    expanded = expanded[keep]
+    amount_cols = [c for c in amount_cols if c in expanded.columns]
+    if apportion and amount_cols:
+        # L'index d'origine (répété par explode) identifie la convention
+        n_sites = expanded.groupby(level=0)["Site"].transform("size")
+        amounts = expanded[amount_cols].apply(pd.to_numeric, errors="coerce")
+        expanded[amount_cols] = amounts.div(n_sites, axis=0)
+    return expanded
+
+fonds_expanded = expand_sites(fonds, year_cols + ["FINANACEMENT TOTALS 2007-2025"],
+                              apportion=REPARTIR_COFINANCEMENT)
 
-# Colonnes annuelles
-year_cols = [c for c in fonds_expanded.columns if isinstance(c, str) and c.startswith("Fonds totale en ")]
 fund = fonds_expanded.melt(id_vars=["Site"], value_vars=year_cols,
                            var_name="Annee_col", value_name="Financement")
 fund["Annee"] = fund["Annee_col"].str.extract(r"(\d{4})").astype(int)
 fund = fund.drop(columns=["Annee_col"])
-fund["Key"] = fund["Site"].apply(normalize_text)
+fund["Key"] = normalize_series(fund["Site"])
 fund["Financement"] = pd.to_numeric(fund["Financement"], errors="coerce").fillna(0)
 
 # Totaux
-fonds_expanded["Key"] = fonds_expanded["Site"].apply(normalize_text)
+fonds_expanded["Key"] = normalize_series(fonds_expanded["Site"])
 totaux = fonds_expanded[["Key","FINANACEMENT TOTALS 2007-2025"]].drop_duplicates()
 totaux = totaux.rename(columns={"FINANACEMENT TOTALS 2007-2025":"Financement_total"})
 
 # ----------------------
 # 4) Correction via fuzzy matching
 # ----------------------
-keys_analysis = set(an["Key"].unique())
-keys_fonds = set(fund["Key"].unique())
+resolver = APNameResolver(sorted(an["Key"].unique()), threshold=SEUIL_CORRESPONDANCE,
+                          normalize=normalize_text)
+corrections = {k: m for k, m in resolver.resolve_many(fund["Key"].unique()).items() if m is not None}
 
-corrections = {}
-for key in keys_fonds:
-    match, score = process.extractOne(key, keys_analysis)
-    if score >= 90:  # seuil configurable
-        corrections[key] = match
-
-fund["Key_corr"] = fund["Key"].apply(lambda k: corrections.get(k, k))
+fund["Key_corr"] = fund["Key"].map(corrections).fillna(fund["Key"])
 
 # ----------------------
 # 5) Fusion des datasets
@@ -125,56 +191,74 @@ df = pd.merge(df, fund[["Key_corr","Annee","Financement"]].rename(columns={"Key_
 for col in ["Financement","Superficie_ha","FIRE_alerts","FCL_ha"]:
     df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
 
-# KPI
-df["FIRE_par_100ha"] = (df["FIRE_alerts"] / (df["Superficie_ha"]+1e-6))*100
-df["FCL_pct_surface"] = (df["FCL_ha"] / (df["Superficie_ha"]+1e-6))*100
-df["Financement_par_ha"] = df["Financement"] / (df["Superficie_ha"]+1e-6)
-df["FCL_pct_variation"] = df.groupby("Key")["FCL_pct_surface"].diff()
-df["FIRE_per_fin"] = df["FIRE_alerts"] / (df["Financement"]+1e-6)
-df["IPC"] = df["FCL_pct_surface"] / (df["Financement_par_ha"]+1e-6)
+# ----------------------
+# 5 bis) Partitions AP x année modifiées depuis la dernière exécution
+# ----------------------
+# Une ligne est identifiée par (Key, Annee, rang dans la partition) : une AP
+# peut recevoir plusieurs lignes de financement la même année
+df["_occ"] = df.groupby(["Key","Annee"]).cumcount()
+row_hash = pd.util.hash_pandas_object(df[["Key","Annee","_occ"] + INPUT_COLS], index=False)
+fingerprints = row_hash.groupby([df["Key"], df["Annee"]]).sum().to_dict()
+
+state = load_state() if MODE_INCREMENTAL else None
+if state is None:
+    dirty_aps = set(df["Key"])
+else:
+    previous = state["fingerprints"]
+    dirty_aps = {key for (key, annee), h in fingerprints.items() if previous.get((key, annee)) != h}
+    dirty_aps |= {key for (key, annee) in previous if (key, annee) not in fingerprints}
+dirty = df["Key"].isin(dirty_aps)
+print(f"🔎 {len(dirty_aps)} AP à recalculer sur {df['Key'].nunique()} ({int(dirty.sum())} lignes)")
+
+# KPI : recalculés pour les AP modifiées (la variation FCL dépend de toute la série de l'AP)
+kpis = compute_kpis(df.loc[dirty])
+if state is not None and not dirty.all():
+    kpis = pd.concat([kpis, state["kpis"].reindex(pd.MultiIndex.from_frame(df.loc[~dirty, ROW_KEY])).set_axis(df.index[~dirty])])
+df = df.join(kpis[KPI_COLS])
 
 # ----------------------
 # 6) Agrégation
 # ----------------------
-agg = df.groupby("Key").agg(
-    Superficie_ha=("Superficie_ha","first"),
-    Financement_total_annuel=("Financement","sum"),
-    Financement_par_ha_moy=("Financement_par_ha","mean"),
-    FCL_pct_moy=("FCL_pct_surface","mean"),
-    FCL_pct_var_moy=("FCL_pct_variation","mean"),
-    FCL_ha_total=("FCL_ha","sum"),
-    FIRE_total=("FIRE_alerts","sum"),
-    FIRE_par_100ha_moy=("FIRE_par_100ha","mean"),
-    FIRE_per_fin_moy=("FIRE_per_fin","mean"),
-    IPC_moy=("IPC","mean"),
-).reset_index()
+agg = aggregate(df.loc[dirty])
+if state is not None:
+    kept = state["agg"][~state["agg"]["Key"].isin(dirty_aps)]
+    agg = pd.concat([kept, agg]).sort_values("Key").reset_index(drop=True)
+agg_brut = agg.copy()
 
 # Fallback financement total
 agg = pd.merge(agg, totaux, on="Key", how="left")
 agg["Financement_total"] = agg["Financement_total"].fillna(agg["Financement_total_annuel"])
 
 # ----------------------
-# 7) Score global
+# 7) Score global (renormalisé sur toutes les AP)
 # ----------------------
-eps = 1e-6
-def norm_inverse(series):
-    mx = max(series.max(), eps)
-    return 1 - (series / (mx + eps))
-
-agg["S_IPC"] = norm_inverse(agg["IPC_moy"])
-agg["S_FCL"] = norm_inverse(agg["FCL_pct_moy"])
-agg["S_FIRE"] = norm_inverse(agg["FIRE_par_100ha_moy"])
-agg["Score_global"] = 0.4*agg["S_IPC"] + 0.4*agg["S_FCL"] + 0.2*agg["S_FIRE"]
+agg = add_scores(agg)
 
 classement = agg.sort_values("Score_global", ascending=False)
 
 # ----------------------
-# 8) Export Excel
+# 8) Export Excel (seuls les fichiers dont le contenu a changé sont réécrits)
 # ----------------------
-df.to_excel("AP_Annuel_clean.xlsx", index=False)
-agg.to_excel("AP_Synthese_clean.xlsx", index=False)
-classement.to_excel("AP_Classement_clean.xlsx", index=False)
+kpi_state = df[ROW_KEY + KPI_COLS].set_index(ROW_KEY)
+df = df.drop(columns=["_occ"])
+exports = state["exports"] if state is not None else {}
+new_exports = {}
+for fichier, table, libelle in [
+    ("AP_Annuel_clean.xlsx", df, "Base annuelle"),
+    ("AP_Synthese_clean.xlsx", agg, "Synthèse par AP"),
+    ("AP_Classement_clean.xlsx", classement, "Classement"),
+]:
+    new_exports[fichier] = frame_digest(table)
+    if exports.get(fichier) == new_exports[fichier] and Path(fichier).exists():
+        print(f"= {libelle} inchangée : {fichier}")
+        continue
+    table.to_excel(fichier, index=False)
+    print(f"✔ {libelle} : {fichier}")
 
-print("✔ Base annuelle : AP_Annuel_clean.xlsx")
-print("✔ Synthèse par AP : AP_Synthese_clean.xlsx")
-print("✔ Classement : AP_Classement_clean.xlsx")
+if MODE_INCREMENTAL:
+    save_state({
+        "fingerprints": fingerprints,
+        "kpis": kpi_state,
+        "agg": agg_brut,
+        "exports": new_exports,
+    })
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Orchestrateur du pipeline : graphe de tâches avec cache par empreintes
+Chaque tâche déclare ses fichiers d'entrée, de sortie et de code. Sa clé
+est l'empreinte SHA-1 de ces entrées et de ce code : une tâche dont la clé
+et les sorties n'ont pas changé depuis la dernière exécution est sautée.
+Les dépendances se déduisent des fichiers (la sortie d'une tâche est
+l'entrée d'une autre) ; les tâches indépendantes (les cinq visualisations,
+les variantes de carte) tournent en parallèle, chacune dans son processus.
+
+    [sources]  kpi -> donnees
+               analyse -> viz1..viz5, carte, carte_nord, carte_sud, carte_interactive
+               analyse, viz1..viz5 -> rapport
+
+La tâche rapport termine la chaîne : le rapport HTML et le rapport exécutif
+markdown sont rédigés à la main (aucun script ne les régénère), elle vérifie
+qu'ils existent et que chaque image qu'ils référencent a bien été produite.
+
+Les tâches [sources] reconstruisent les classeurs AP_*_clean.xlsx et le
+tableau annuel depuis les classeurs bruts ; elles ne sont incluses qu'avec
+--sources, sinon leurs sorties sont traitées comme des entrées.
+
+Usage:
+    python3 pipeline_runner.py                  # analyse, visualisations, cartes
+    python3 pipeline_runner.py --sources        # depuis les classeurs bruts
+    python3 pipeline_runner.py viz3 carte_sud   # cibles et leurs dépendances
+    python3 pipeline_runner.py --force          # ignorer le cache
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from pathlib import Path
+
+from excel_cache import file_digest
+
+ROOT = Path(__file__).resolve().parent
+STATE_PATH = ROOT / ".cache" / "pipeline" / "etat.json"
+# Nombre de tâches simultanées (défaut : nombre de CPU)
+WORKERS = int(os.environ.get("PIPELINE_WORKERS", 0)) or None
+
+YEARLY_CSV = "backend/data/unified_yearly.csv"
+SNAPSHOT_CURRENT = "backend/data/snapshot/CURRENT"
+ANALYSE_JSON = "backend/data/analyse_financement_deforestation.json"
+MATCHING_CODE = ["ap_matching.py", "name_normalizer.py", "ap_aliases.json"]
+RAPPORT_HTML = "frontend/rapport_financement_deforestation.html"
+RAPPORT_MD = "RAPPORT_EXECUTIF_FINANCEMENT_DEFORESTATION.md"
+
+
+class Task:
+    """Étape du pipeline : un script, ou une action exécutée dans un processus dédié"""
+
+    def __init__(self, name, inputs, outputs, code, script=None, action=None, sources=False, env=()):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.code = code
+        self.script = script
+        self.action = action
+        self.sources = sources
+        # Variables d'environnement qui changent le résultat (entrent dans la clé)
+        self.env = env
+
+    def command(self):
+        if self.script is not None:
+            return [sys.executable, self.script]
+        return [sys.executable, str(Path(__file__).resolve()), "--tache", self.name]
+
+    def describe(self):
+        """Définition de la tâche telle qu'elle entre dans sa clé"""
+        if self.script is not None:
+            return self.script
+        return f"{self.action.func.__name__}{self.action.args}"
+
+
+# ---------- Actions (exécutées dans le processus de la tâche) ----------
+def _donnees():
+    from real_data_processor import RealDataProcessor
+    processor = RealDataProcessor()
+    if not processor.generate_dashboard_data():
+        raise RuntimeError("génération de dashboard_data impossible")
+    processor.generate_unified_yearly()
+
+
+def _visualisation(method):
+    from generer_visualisations import VisualizationGenerator
+    generator = VisualizationGenerator()
+    generator.load_data()
+    getattr(generator, method)()
+
+
+def _carte(method):
+    from generer_carte_madagascar import CarteMadagascar
+    generator = CarteMadagascar()
+    generator.load_data()
+    getattr(generator, method)()
+
+
+def _carte_interactive():
+    from generer_carte_interactive import CarteInteractiveMadagascar
+    CarteInteractiveMadagascar().generate_all_maps()
+
+
+def _rapport():
+    """Rapports présents et images référencées (src="..." du HTML, *.png du markdown) produites"""
+    import re
+    missing = [path for path in (RAPPORT_HTML, RAPPORT_MD) if not (ROOT / path).exists()]
+    if not missing:
+        html = (ROOT / RAPPORT_HTML).read_text(encoding="utf-8")
+        images = {(ROOT / RAPPORT_HTML).parent / src for src in re.findall(r'src="([^":]+\.png)"', html)}
+        markdown = (ROOT / RAPPORT_MD).read_text(encoding="utf-8")
+        images |= {ROOT / "frontend/visualizations" / name
+                   for name in re.findall(r"([\w-]+\.png)", markdown)}
+        missing = sorted(str(path.relative_to(ROOT)) for path in images if not path.exists())
+    if missing:
+        raise RuntimeError(f"Rapport incomplet, fichiers manquants : {', '.join(missing)}")
+    print(f"📄 Rapports à jour : {RAPPORT_HTML}, {RAPPORT_MD}")
+
+
+def _build_tasks():
+    yearly = [YEARLY_CSV, SNAPSHOT_CURRENT]
+    viz_code = ["generer_visualisations.py", "render_cache.py", "backend/data_snapshot.py"]
+    visualisations = [
+        ("viz1", "viz1_correlation_scatter", "correlation_financement_deforestation.png"),
+        ("viz2", "viz2_temporal_evolution", "evolution_temporelle.png"),
+        ("viz3", "viz3_segmentation_quadrant", "segmentation_ap.png"),
+        ("viz4", "viz4_top_performers", "top_bottom_performers.png"),
+        ("viz5", "viz5_correlation_by_ap", "correlation_par_ap.png"),
+    ]
+    cartes = [
+        ("carte", "create_map", "carte_madagascar_ap.png"),
+        ("carte_nord", "create_map_zoom_nord", "carte_madagascar_zoom_nord.png"),
+        ("carte_sud", "create_map_zoom_sud", "carte_madagascar_zoom_sud.png"),
+    ]
+    tasks = [
+        Task("kpi", script="pipeline_kpi_ap.py", sources=True,
+             inputs=["Fonds 2007-25.xlsx", "OutLook 2024 data Analyse deforestation & fires.xlsx"],
+             outputs=["AP_Annuel_clean.xlsx", "AP_Synthese_clean.xlsx", "AP_Classement_clean.xlsx"],
+             code=["pipeline_kpi_ap.py", "kpi_scenarios.py", "excel_cache.py"] + MATCHING_CODE,
+             env=("KPI_SEUIL_CORRESPONDANCE",)),
+        Task("donnees", action=partial(_donnees), sources=True,
+             inputs=["AP_coords.csv", "Fonds 2007-25.xlsx", "Liste sites financés clean.xlsx",
+                     "AP_Synthese_clean.xlsx", "AP_Annuel_clean.xlsx"],
+             outputs=["backend/data/dashboard_data.json", SNAPSHOT_CURRENT],
+             code=["real_data_processor.py", "excel_cache.py", "backend/data_snapshot.py",
+                   "backend/yearly_cache.py"] + MATCHING_CODE),
+        Task("analyse", script="analyse_financement_deforestation.py",
+             inputs=yearly + ["AP_Synthese_clean.xlsx"],
+             outputs=[ANALYSE_JSON],
+             code=["analyse_financement_deforestation.py", "correlation_engine.py", "efficiency_scoring.py",
+                   "panel_analysis.py", "excel_cache.py", "backend/data_snapshot.py"],
+             env=("ANALYSE_BOOTSTRAP", "ANALYSE_SEED")),
+    ]
+    for name, method, png in visualisations:
+        tasks.append(Task(name, action=partial(_visualisation, method),
+                          inputs=yearly + [ANALYSE_JSON],
+                          outputs=[f"frontend/visualizations/{png}"], code=viz_code))
+    for name, method, png in cartes:
+        tasks.append(Task(name, action=partial(_carte, method),
+                          inputs=["AP_coords.csv", ANALYSE_JSON],
+                          outputs=[f"frontend/visualizations/{png}"],
+                          code=["generer_carte_madagascar.py", "render_cache.py"] + MATCHING_CODE))
+    tasks.append(Task("carte_interactive", action=partial(_carte_interactive),
+                      inputs=["AP_coords.csv", ANALYSE_JSON],
+                      outputs=["frontend/carte_madagascar_interactive.html",
+                               "frontend/carte_madagascar_complete.html"],
+                      code=["generer_carte_interactive.py"] + MATCHING_CODE))
+    tasks.append(Task("rapport", action=partial(_rapport),
+                      inputs=[ANALYSE_JSON, RAPPORT_HTML, RAPPORT_MD]
+                      + [f"frontend/visualizations/{png}" for _, _, png in visualisations],
+                      outputs=[], code=["pipeline_runner.py"]))
+    return {task.name: task for task in tasks}
+
+
+TASKS = _build_tasks()
+
+
+# ---------- Empreintes et état ----------
+def _digest(path):
+    try:
+        return file_digest(ROOT / path)
+    except OSError:
+        return None
+
+
+def task_key(task):
+    """Empreinte de la définition, du code, des entrées et de l'environnement de la tâche"""
+    h = hashlib.sha1(task.describe().encode("utf-8"))
+    for path in task.code + task.inputs:
+        h.update(f"|{path}={_digest(path)}".encode("utf-8"))
+    for name in task.env:
+        h.update(f"|${name}={os.environ.get(name)}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_state():
+    try:
+        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, STATE_PATH)
+
+
+def is_fresh(task, key, state):
+    """Même clé qu'à la dernière exécution réussie et sorties intactes"""
+    entry = state.get(task.name)
+    if entry is None or entry["key"] != key:
+        return False
+    return all(
+        entry["outputs"].get(path) is not None and _digest(path) == entry["outputs"][path]
+        for path in task.outputs
+    )
+
+
+# ---------- Graphe ----------
+def select_tasks(targets=None, sources=False):
+    """Tâches à exécuter : les cibles et leurs dépendances, dans l'ordre du graphe"""
+    # Une tâche [sources] demandée explicitement est incluse
+    available = {name: task for name, task in TASKS.items()
+                 if sources or not task.sources or name in (targets or ())}
+    producers = {path: name for name, task in available.items() for path in task.outputs}
+    deps = {
+        name: sorted({producers[path] for path in task.inputs if producers.get(path, name) != name})
+        for name, task in available.items()
+    }
+    if targets:
+        unknown = [t for t in targets if t not in TASKS]
+        if unknown:
+            raise ValueError(f"Tâches inconnues : {', '.join(unknown)}")
+        selected, stack = set(), [t for t in targets if t in available]
+        while stack:
+            name = stack.pop()
+            if name not in selected:
+                selected.add(name)
+                stack.extend(deps[name])
+    else:
+        selected = set(available)
+    return {name: deps[name] for name in available if name in selected}
+
+
+def _execute(task, verbose):
+    env = {**os.environ, "MPLBACKEND": "Agg"}
+    start = time.perf_counter()
+    result = subprocess.run(task.command(), cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if verbose and result.stdout:
+        print(result.stdout)
+    return result, elapsed
+
+
+def run_pipeline(targets=None, sources=False, force=False, workers=WORKERS, verbose=False):
+    """Exécuter le graphe ; renvoie {tâche: (statut, durée en secondes)}
+
+    Statuts : "exécutée", "cache", "échec", "bloquée" (une dépendance a échoué).
+    """
+    graph = select_tasks(targets, sources)
+    state = load_state()
+    results = {}
+    pending = dict(graph)
+    running = {}
+    workers = max(1, min(len(graph) or 1, workers or os.cpu_count() or 1))
+    start = time.perf_counter()
+
+    print(f"🧩 Pipeline : {len(graph)} tâches, {workers} en parallèle")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name, deps in list(pending.items()):
+                if any(d not in results for d in deps):
+                    continue
+                del pending[name]
+                task = TASKS[name]
+                if any(results[d][0] in ("échec", "bloquée") for d in deps):
+                    results[name] = ("bloquée", 0.0)
+                    print(f"⛔ {name} : dépendance en échec")
+                    continue
+                key = task_key(task)
+                if not force and is_fresh(task, key, state):
+                    results[name] = ("cache", 0.0)
+                    print(f"⏭  {name} : inchangée")
+                    continue
+                print(f"▶️  {name}")
+                running[pool.submit(_execute, task, verbose)] = (name, key)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, key = running.pop(future)
+                task = TASKS[name]
+                result, elapsed = future.result()
+                if result.returncode != 0:
+                    results[name] = ("échec", elapsed)
+                    print(f"❌ {name} ({elapsed:.1f}s)")
+                    print("\n".join(result.stderr.strip().splitlines()[-10:]))
+                    state.pop(name, None)
+                else:
+                    results[name] = ("exécutée", elapsed)
+                    print(f"✅ {name} ({elapsed:.1f}s)")
+                    state[name] = {
+                        "key": key,
+                        "outputs": {path: _digest(path) for path in task.outputs},
+                        "duration": round(elapsed, 3),
+                    }
+                save_state(state)
+
+    print_report(results, time.perf_counter() - start)
+    return results
+
+
+def print_report(results, wall_time):
+    """Durée et statut de chaque tâche"""
+    icons = {"exécutée": "✅", "cache": "⏭ ", "échec": "❌", "bloquée": "⛔"}
+    print("\n" + "=" * 60)
+    print("⏱️  TEMPS PAR ÉTAPE")
+    print("=" * 60)
+    for name in TASKS:
+        if name in results:
+            status, elapsed = results[name]
+            print(f"   {icons[status]} {name:<20} {status:<10} {elapsed:7.2f}s")
+    cumulative = sum(elapsed for _, elapsed in results.values())
+    print("-" * 60)
+    print(f"   Total : {wall_time:.2f}s (somme des tâches {cumulative:.2f}s)")
+    print("=" * 60 + "\n")
+
+
+def succeeded(results):
+    return all(status in ("exécutée", "cache") for status, _ in results.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline du rapport financement-déforestation")
+    parser.add_argument("targets", nargs="*", help="tâches à produire (défaut : toutes)")
+    parser.add_argument("--sources", action="store_true",
+                        help="reconstruire aussi les données depuis les classeurs bruts")
+    parser.add_argument("--force", action="store_true", help="ignorer le cache")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("-v", "--verbose", action="store_true", help="afficher la sortie des tâches")
+    parser.add_argument("--tache", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.tache:
+        TASKS[args.tache].action()
+        sys.exit(0)
+
+    results = run_pipeline(args.targets, args.sources, args.force, args.workers, args.verbose)
+    sys.exit(0 if succeeded(results) else 1)
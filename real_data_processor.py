@@ -6,11 +6,19 @@ Utilise les vrais fichiers CSV et Excel au lieu des données simulées
 
 import pandas as pd
 import numpy as np
-import json
 from pathlib import Path
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# Lecture des classeurs avec cache binaire (excel_cache.py)
+from excel_cache import read_excel, load_sources
+from ap_matching import APNameResolver
+
+# Snapshot binaire partagé avec l'API (backend/data_snapshot.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+from data_snapshot import save_outputs
+
 class RealDataProcessor:
     def __init__(self, data_path="."):
         self.data_path = Path(data_path)
@@ -23,30 +31,38 @@ class RealDataProcessor:
         """Charger toutes les données réelles"""
         print("🔄 Chargement des données réelles...")
         
+        # Lectures indépendantes lancées en parallèle ; chaque fichier garde son rapport d'erreur
+        sources = load_sources({
+            "coords": (self.data_path / "AP_coords.csv", {}),
+            "financement": (self.data_path / "Fonds 2007-25.xlsx", {"sheet_name": 0}),
+            "synthese": (self.data_path / "AP_Synthese_clean.xlsx", {"sheet_name": 0}),
+            "sites": (self.data_path / "Liste sites financés clean.xlsx", {"sheet_name": 0}),
+        })
+        
         # 1. Charger les coordonnées GPS
         try:
-            self.ap_coords = pd.read_csv(self.data_path / "AP_coords.csv")
+            self.ap_coords = sources["coords"].result()
             print(f"✅ Coordonnées chargées: {len(self.ap_coords)} aires protégées")
         except Exception as e:
             print(f"❌ Erreur chargement coordonnées: {e}")
             
         # 2. Charger les données de financement historique
         try:
-            self.financement_data = pd.read_excel(self.data_path / "Fonds 2007-25.xlsx", sheet_name=0)
+            self.financement_data = sources["financement"].result()
             print(f"✅ Données de financement chargées: {len(self.financement_data)} lignes")
         except Exception as e:
             print(f"❌ Erreur chargement financement: {e}")
             
         # 3. Charger la synthèse des AP
         try:
-            self.ap_synthese = pd.read_excel(self.data_path / "AP_Synthese_clean.xlsx", sheet_name=0)
+            self.ap_synthese = sources["synthese"].result()
             print(f"✅ Synthèse AP chargée: {len(self.ap_synthese)} aires protégées")
         except Exception as e:
             print(f"❌ Erreur chargement synthèse: {e}")
             
         # 4. Charger la liste des sites financés
         try:
-            self.sites_finances = pd.read_excel(self.data_path / "Liste sites financés clean.xlsx", sheet_name=0)
+            self.sites_finances = sources["sites"].result()
             print(f"✅ Sites financés chargés: {len(self.sites_finances)} sites")
         except Exception as e:
             print(f"❌ Erreur chargement sites: {e}")
@@ -134,6 +150,7 @@ class RealDataProcessor:
         merged_data = []
         
         # Créer un dictionnaire des coordonnées
+        # (clé en double dans AP_coords.csv : la dernière ligne l'emporte, comme historiquement)
         coords_dict = {}
         if self.ap_coords is not None:
             for _, row in self.ap_coords.iterrows():
@@ -141,25 +158,20 @@ class RealDataProcessor:
                     'lat': row['Latitude'],
                     'lng': row['Longitude']
                 }
+        # Synthèse : première entrée retenue, comme l'ancien parcours de la liste
+        synthese_dict = {}
+        for synth in synthese_data or []:
+            synthese_dict.setdefault(synth['key'].upper(), synth)
+        
+        # Résolution des noms vers chaque registre (une fois par nom distinct)
+        names = [financement['name'] for financement in financement_data]
+        coords_match = APNameResolver(coords_dict, containment=True).resolve_many(names)
+        synthese_match = APNameResolver(synthese_dict, containment=True).resolve_many(names)
         
         # Fusionner les données
         for financement in financement_data:
-            ap_name = financement['name'].upper()
-            
-            # Trouver les coordonnées correspondantes
-            coords = None
-            for key in coords_dict:
-                if key in ap_name or ap_name in key:
-                    coords = coords_dict[key]
-                    break
-            
-            # Trouver les données de synthèse correspondantes
-            synthese_info = None
-            if synthese_data:
-                for synth in synthese_data:
-                    if synth['key'].upper() in ap_name or ap_name in synth['key'].upper():
-                        synthese_info = synth
-                        break
+            coords = coords_dict.get(coords_match[financement['name']])
+            synthese_info = synthese_dict.get(synthese_match[financement['name']])
             
             merged_item = {
                 'area_id': financement['area_id'],
@@ -227,10 +239,7 @@ class RealDataProcessor:
         
         # Sauvegarder les données
         output_path = Path("backend/data")
-        output_path.mkdir(exist_ok=True)
-        
-        with open(output_path / "dashboard_data.json", "w", encoding="utf-8") as f:
-            json.dump(dashboard_data, f, indent=2, default=str)
+        save_outputs(output_path, dashboard=dashboard_data)
         
         # Sauvegarder aussi en CSV pour analyse
         df_merged = pd.DataFrame(merged_data)
@@ -267,7 +276,7 @@ class RealDataProcessor:
         yearly_df = pd.DataFrame()
         if annuel_path.exists():
             try:
-                tmp = pd.read_excel(annuel_path, sheet_name=0)
+                tmp = read_excel(annuel_path, sheet_name=0)
                 # deviner nom de la colonne AP
                 candidate_cols = [c for c in tmp.columns if str(c).lower() in ['ap', 'ap_name', 'site', 'key', 'nom ap', 'ap name'] or 'site' in str(c).lower() or 'ap' in str(c).lower()]
                 ap_col = candidate_cols[0] if candidate_cols else tmp.columns[0]
@@ -320,9 +329,7 @@ class RealDataProcessor:
         yearly_df = yearly_df[final_cols].sort_values(['AP_Name', 'Année'])
 
         out_dir = Path('backend/data')
-        out_dir.mkdir(exist_ok=True)
-        out_csv = out_dir / 'unified_yearly.csv'
-        yearly_df.to_csv(out_csv, index=False)
+        save_outputs(out_dir, yearly_df=yearly_df)
         print(f"✅ unified_yearly.csv écrit ({len(yearly_df)} lignes)")
         return yearly_df
 
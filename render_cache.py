@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Cache de rendu des figures (PNG)
+Chaque image est associée à une clé : empreinte des données qu'elle trace
+(la tranche exacte, pas le fichier source entier), du code de la méthode
+qui la dessine (tailles, couleurs, dpi) et du style matplotlib actif.
+Si la clé et l'image sur disque n'ont pas changé, le rendu est sauté.
+
+Usage:
+    from render_cache import RenderCache, render_key
+    cache = RenderCache()
+    key = render_key(df_plot, rapport["correlation"], code=self.viz1_correlation_scatter)
+    if cache.hit(output, key):
+        return
+    ...  # tracer, plt.savefig(output)
+    cache.store(output, key)
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from excel_cache import file_digest
+
+CACHE_DIR = Path(os.environ.get("RENDER_CACHE_DIR", Path(__file__).resolve().parent / ".cache" / "render"))
+# RENDER_CACHE=0 : toujours redessiner
+CACHE_ENABLED = os.environ.get("RENDER_CACHE", "1") != "0"
+# Paramètres matplotlib sans effet sur l'image produite
+_IGNORED_RC = {"backend", "backend_fallback", "interactive", "webagg.port", "savefig.directory"}
+
+
+def _style_digest():
+    import matplotlib
+    params = {k: v for k, v in matplotlib.rcParams.items() if k not in _IGNORED_RC}
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _update(h, value):
+    if isinstance(value, pd.DataFrame):
+        h.update("|".join(map(str, value.columns)).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        h.update(str(value.name).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(str(value.dtype).encode("utf-8"))
+        h.update(np.ascontiguousarray(value).tobytes())
+    else:
+        h.update(json.dumps(value, sort_keys=True, default=str).encode("utf-8"))
+
+
+def render_key(*inputs, code=None, **params):
+    """Empreinte des données tracées, des paramètres, du code et du style"""
+    h = hashlib.sha1()
+    for value in inputs:
+        _update(h, value)
+        h.update(b"|")
+    _update(h, params)
+    if code is not None:
+        h.update(inspect.getsource(code).encode("utf-8"))
+    h.update(_style_digest().encode("utf-8"))
+    return h.hexdigest()
+
+
+class RenderCache:
+    """Clés des images déjà rendues, une entrée JSON par fichier de sortie"""
+
+    def __init__(self, root=CACHE_DIR, enabled=CACHE_ENABLED):
+        self.root = Path(root)
+        self.enabled = enabled
+        # Dernier résultat par image : "hit" ou "miss"
+        self.stats = {}
+        self.last = None
+
+    def _entry_path(self, output):
+        name = hashlib.sha1(str(Path(output).resolve()).encode("utf-8")).hexdigest()[:16]
+        return self.root / f"{name}.json"
+
+    def _record(self, output, status):
+        self.stats[Path(output).name] = status
+        self.last = status
+
+    def hit(self, output, key):
+        """True si l'image existe et a été rendue avec cette clé"""
+        output = Path(output)
+        fresh = False
+        if self.enabled and output.exists():
+            try:
+                entry = json.loads(self._entry_path(output).read_text(encoding="utf-8"))
+                fresh = entry["key"] == key and entry["sha1"] == file_digest(output)
+            except (OSError, ValueError, KeyError):
+                fresh = False
+        self._record(output, "hit" if fresh else "miss")
+        if fresh:
+            print(f"   ⏭  {output.name} inchangée (cache)")
+        return fresh
+
+    def store(self, output, key):
+        """Enregistrer la clé d'une image qui vient d'être écrite"""
+        if not self.enabled:
+            return
+        path = self._entry_path(output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"output": str(output), "key": key, "sha1": file_digest(output)}),
+                       encoding="utf-8")
+        os.replace(tmp, path)
+
+    def summary(self):
+        """{"hits": n, "misses": n}"""
+        statuses = list(self.stats.values())
+        return {"hits": statuses.count("hit"), "misses": statuses.count("miss")}
+
+    def report(self, stats=None):
+        """Afficher le résultat par image (stats : {image: statut}, défaut self.stats)"""
+        stats = self.stats if stats is None else stats
+        if not stats:
+            return
+        print("\n🗂️  Cache de rendu :")
+        for name, status in stats.items():
+            print(f"   {'⏭ ' if status == 'hit' else '🎨'} {name:<45} {status}")
+        hits = sum(1 for status in stats.values() if status == "hit")
+        print(f"   {hits} hit(s), {len(stats) - hits} miss(es)")